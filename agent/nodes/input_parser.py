@@ -12,6 +12,7 @@ import json
 import logging
 import re
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
 from typing import Any, Dict, List, Optional, cast
 
@@ -117,7 +118,7 @@ def _build_incident_and_checklist_templates(scenario_type: str) -> tuple[Dict[st
         }
         checklist_fields = {k: False for k in incident_fields.keys()}
         return incident_fields, checklist_fields
-    for field in scenario.p1_fields + scenario.p2_fields:
+    for field in chain(scenario.p1_fields, scenario.p2_fields):
         key = field.get("key")
         if key:
             incident_fields[key] = None
@@ -1173,7 +1174,7 @@ def _get_scenario_field_keys(scenario_type: Optional[str]) -> set[str]:
     # 收集场景特定字段
     scenario_fields = {
         str(field.get("key"))
-        for field in scenario.p1_fields + scenario.p2_fields
+        for field in chain(scenario.p1_fields, scenario.p2_fields)
         if field.get("key")
     }
 
@@ -1190,7 +1191,7 @@ def _build_field_descriptions_for_llm(scenario_type: Optional[str]) -> str:
         return "- position: 事发位置\n- flight_no: 航班号"
 
     field_descriptions = []
-    for field in scenario.p1_fields + scenario.p2_fields:
+    for field in chain(scenario.p1_fields, scenario.p2_fields):
         key = field.get("key")
         if not key:
             continue
@@ -9,6 +9,7 @@ Agent 状态定义
 from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
+from itertools import chain
 from pydantic import BaseModel, Field
 
 
@@ -210,7 +211,7 @@ def create_initial_state(
 
     if scenario:
         # 初始化事件字段
-        for field in scenario.p1_fields + scenario.p2_fields:
+        for field in chain(scenario.p1_fields, scenario.p2_fields):
             key = field.get("key")
             if key:
                 incident_fields[key] = None
@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import logging
+import os
 import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
@@ -14,9 +15,11 @@ from typing import Optional, List, Dict, Any
 
 import json
 import asyncio
+import orjson
 from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from agent.graph import agent, get_agent_config
@@ -27,12 +30,14 @@ from apps.api.analyze import router as analyze_router
 from apps.api.rate_limit import rate_limit_check
 from config.logging_config import setup_logging
 from config.settings import settings
+from constraints.loader import get_loader
 
 # 初始化日志配置
 setup_logging()
 logger = logging.getLogger(__name__)
 
 backend = settings.STORAGE_BACKEND or settings.SESSION_STORE_BACKEND
+_SESSION_TTL = settings.SESSION_TTL_SECONDS
 session_store = get_session_store(backend)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -63,6 +68,11 @@ def get_fsm_states_for_scenario(scenario_type: str) -> List[Dict[str, Any]]:
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await session_store.init()
+    try:
+        # 预解析场景约束：首个 worker 写入的解析缓存供其余 worker 复用
+        get_loader().preload()
+    except Exception as exc:
+        logger.warning("预加载场景约束失败: %s", exc)
     yield
 
 
@@ -249,7 +259,7 @@ async def start_event(
         raise HTTPException(status_code=500, detail=str(e))
     
     # 保存会话
-    await session_store.set(session_id, result, settings.SESSION_TTL_SECONDS)
+    await session_store.set(session_id, result, _SESSION_TTL)
     
     # 提取工具调用信息
     tool_calls = []
@@ -367,7 +377,7 @@ async def chat_event(
         raise HTTPException(status_code=500, detail=str(e))
     
     # 更新会话
-    await session_store.set(session_id, result, settings.SESSION_TTL_SECONDS)
+    await session_store.set(session_id, result, _SESSION_TTL)
 
     # 提取工具调用信息
     tool_calls = []
@@ -451,6 +461,10 @@ async def get_event_status(
     }
 
 
+# 报告序列化选项：允许非字符串键（与 jsonable_encoder 行为一致）
+_REPORT_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
 @app.get("/event/{session_id}/report")
 async def get_event_report(
     session_id: str,
@@ -467,10 +481,18 @@ async def get_event_report(
     if not state:
         raise HTTPException(status_code=404, detail="会话不存在")
 
-    if not state.get("final_report"):
+    final_report = state.get("final_report")
+    if not final_report:
         raise HTTPException(status_code=400, detail="报告尚未生成")
 
-    return state.get("final_report")
+    # 整体序列化后再返回；orjson 不支持的值（如超出 64 位的整数）回退到 jsonable_encoder
+    try:
+        content = orjson.dumps(final_report, default=str, option=_REPORT_JSON_OPTIONS)
+    except (TypeError, orjson.JSONEncodeError) as exc:
+        logger.warning("orjson failed to serialize report for session %s: %s", session_id, exc)
+        return JSONResponse(content=jsonable_encoder(final_report))
+
+    return Response(content=content, media_type="application/json")
 
 
 @app.get("/event/{session_id}/report/markdown")
@@ -500,7 +522,6 @@ async def get_event_report_markdown(
     # 生成文件名
     filename = f"机坪特情处置检查单_{flight_no}_{session_id[:8]}.md"
 
-    from fastapi.responses import Response
     return Response(
         content=final_answer,
         media_type="text/markdown; charset=utf-8",
@@ -535,8 +556,48 @@ async def close_event(
 # 流式接口 (SSE - Server-Sent Events)
 # ============================================================
 
+# 流式事件中按需附带的状态字段（值为真时才写入事件）
+_STREAM_FIELDS = (
+    "current_thought",
+    "current_action",
+    "current_observation",
+    "reasoning_steps",
+    "risk_assessment",
+    "spatial_analysis",
+    "flight_impact_prediction",
+    "final_answer",
+)
+
+# 节点名 -> 该节点可能更新的字段，未登记的节点回退到全部字段
+_NODE_STREAM_FIELDS: Dict[str, tuple] = {
+    "input_parser": (
+        "reasoning_steps",
+        "risk_assessment",
+        "spatial_analysis",
+        "flight_impact_prediction",
+    ),
+    "reasoning": (
+        "current_thought",
+        "current_action",
+        "reasoning_steps",
+        "final_answer",
+    ),
+    "tool_executor": (
+        "current_action",
+        "current_observation",
+        "reasoning_steps",
+        "risk_assessment",
+        "spatial_analysis",
+        "flight_impact_prediction",
+        "final_answer",
+    ),
+    "fsm_validator": (),
+    "output_generator": ("final_answer",),
+}
+
+
 def extract_stream_event(node_name: str, state: dict) -> dict:
-    """从节点执行结果中提取流式事件数据"""
+    """从节点执行结果中提取流式事件数据（仅附带该节点负责更新的字段）"""
     event = {
         "node": node_name,
         "timestamp": datetime.now().isoformat(),
@@ -550,43 +611,17 @@ def extract_stream_event(node_name: str, state: dict) -> dict:
     if state.get("incident"):
         event["incident"] = state.get("incident")
 
-    # 提取当前推理步骤
-    if state.get("current_thought"):
-        event["current_thought"] = state.get("current_thought")
-
-    # 提取当前动作
-    if state.get("current_action"):
-        event["current_action"] = state.get("current_action")
-        event["current_action_input"] = state.get("current_action_input", {})
-
-    # 提取观察结果
-    if state.get("current_observation"):
-        event["current_observation"] = state.get("current_observation")
-
-    # 提取推理步骤
-    reasoning_steps = state.get("reasoning_steps", [])
-    if reasoning_steps:
-        event["reasoning_steps"] = reasoning_steps
-
-    # 提取风险评估
-    if state.get("risk_assessment"):
-        event["risk_assessment"] = state.get("risk_assessment")
-
-    # 提取空间分析
-    if state.get("spatial_analysis"):
-        event["spatial_analysis"] = state.get("spatial_analysis")
-
-    # 提取航班影响
-    if state.get("flight_impact_prediction"):
-        event["flight_impact_prediction"] = state.get("flight_impact_prediction")
+    for field in _NODE_STREAM_FIELDS.get(node_name, _STREAM_FIELDS):
+        value = state.get(field)
+        if value:
+            event[field] = value
+            # 动作与动作参数成对下发
+            if field == "current_action":
+                event["current_action_input"] = state.get("current_action_input", {})
 
     # 提取是否完成
     event["is_complete"] = state.get("is_complete", False)
 
-    # 提取最终答案
-    if state.get("final_answer"):
-        event["final_answer"] = state.get("final_answer")
-
     # 提取agent询问消息（从messages中获取最新的assistant消息）
     messages = state.get("messages", [])
     for msg in reversed(messages):
@@ -645,7 +680,7 @@ async def stream_agent_execution(state: dict, session_id: str):
         yield f"event: complete\ndata: {json.dumps(final_event, ensure_ascii=False, default=str)}\n\n"
 
         # 保存会话状态
-        await session_store.set(session_id, state, settings.SESSION_TTL_SECONDS)
+        await session_store.set(session_id, state, _SESSION_TTL)
 
     except Exception as e:
         logger.exception("Stream execution error")
@@ -728,11 +763,42 @@ async def chat_event_stream(
     )
 
 
+def _resolve_worker_count() -> int:
+    """
+    计算 uvicorn worker 数
+
+    - reload（DEBUG）模式只能单进程运行
+    - 显式配置 API_WORKERS 时按配置启动
+    - 内存会话存储不在进程间共享，未显式配置时只启动 1 个 worker，
+      否则请求落到其他 worker 会找不到会话
+    - 其余情况按 CPU 核数 * 2 + 1 计算
+
+    注意：速率限制计数始终保存在各 worker 进程内存中，多 worker 时
+    实际限额为 RATE_LIMIT_REQUESTS * worker 数。
+    """
+    if settings.DEBUG:
+        return 1
+    if settings.API_WORKERS > 0:
+        return settings.API_WORKERS
+    if backend == "memory":
+        return 1
+    return (os.cpu_count() or 1) * 2 + 1
+
+
 if __name__ == "__main__":
     import uvicorn
+
+    workers = _resolve_worker_count()
+    if workers > 1 and backend == "memory":
+        logger.warning(
+            "多 worker 模式下内存会话存储与速率限制计数不在进程间共享，建议使用 redis/postgres 后端"
+        )
     uvicorn.run(
         "apps.api.main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.DEBUG,
+        workers=workers,
+        loop="auto",
+        http="auto",
     )
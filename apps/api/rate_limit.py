@@ -5,9 +5,9 @@
 """
 import asyncio
 import logging
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, List
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict
 
 from fastapi import HTTPException, Request
 
@@ -15,11 +15,25 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 滑动窗口长度（秒）
+_WINDOW_SECONDS = 60.0
+
+# 导入时解析配置，避免每个请求都走 Pydantic Settings 属性访问
+_RL_ENABLED = settings.RATE_LIMIT_ENABLED
+_RL_LIMIT = settings.RATE_LIMIT_REQUESTS
+
 # 请求计数存储（内存实现，生产环境应使用 Redis）
-_request_counts: Dict[str, List[datetime]] = defaultdict(list)
+# 每个客户端一个按时间递增的 monotonic 时间戳队列，过期记录从队头弹出
+_request_counts: Dict[str, Deque[float]] = defaultdict(deque)
 _lock = asyncio.Lock()
 
 
+def _evict_expired(timestamps: Deque[float], window_start: float) -> None:
+    """从队头弹出窗口外的过期时间戳（均摊 O(过期数)）"""
+    while timestamps and timestamps[0] <= window_start:
+        timestamps.popleft()
+
+
 async def rate_limit_check(request: Request) -> None:
     """
     速率限制检查
@@ -30,7 +44,7 @@ async def rate_limit_check(request: Request) -> None:
     Raises:
         HTTPException: 超过速率限制
     """
-    if not settings.RATE_LIMIT_ENABLED:
+    if not _RL_ENABLED:
         return
 
     # 获取客户端标识（优先使用 API Key，否则使用 IP）
@@ -40,30 +54,29 @@ async def rate_limit_check(request: Request) -> None:
     else:
         client_id = f"ip:{request.client.host}" if request.client else "ip:unknown"
 
-    now = datetime.now()
-    window_start = now - timedelta(minutes=1)
+    now = time.monotonic()
+    window_start = now - _WINDOW_SECONDS
 
     async with _lock:
         # 清理过期记录
-        _request_counts[client_id] = [
-            t for t in _request_counts[client_id] if t > window_start
-        ]
+        timestamps = _request_counts[client_id]
+        _evict_expired(timestamps, window_start)
 
         # 检查是否超限
-        current_count = len(_request_counts[client_id])
-        if current_count >= settings.RATE_LIMIT_REQUESTS:
+        current_count = len(timestamps)
+        if current_count >= _RL_LIMIT:
             logger.warning(
                 f"速率限制触发: {client_id}, "
-                f"请求数: {current_count}/{settings.RATE_LIMIT_REQUESTS}"
+                f"请求数: {current_count}/{_RL_LIMIT}"
             )
             raise HTTPException(
                 status_code=429,
-                detail=f"请求过于频繁，每分钟最多 {settings.RATE_LIMIT_REQUESTS} 次",
+                detail=f"请求过于频繁，每分钟最多 {_RL_LIMIT} 次",
                 headers={"Retry-After": "60"},
             )
 
         # 记录请求
-        _request_counts[client_id].append(now)
+        timestamps.append(now)
 
 
 async def get_rate_limit_status(request: Request) -> dict:
@@ -76,7 +89,7 @@ async def get_rate_limit_status(request: Request) -> dict:
     Returns:
         速率限制状态信息
     """
-    if not settings.RATE_LIMIT_ENABLED:
+    if not _RL_ENABLED:
         return {"enabled": False}
 
     api_key = request.headers.get("X-API-Key")
@@ -85,20 +98,18 @@ async def get_rate_limit_status(request: Request) -> dict:
     else:
         client_id = f"ip:{request.client.host}" if request.client else "ip:unknown"
 
-    now = datetime.now()
-    window_start = now - timedelta(minutes=1)
+    window_start = time.monotonic() - _WINDOW_SECONDS
 
     async with _lock:
         # 清理过期记录
-        _request_counts[client_id] = [
-            t for t in _request_counts[client_id] if t > window_start
-        ]
-        current_count = len(_request_counts[client_id])
+        timestamps = _request_counts[client_id]
+        _evict_expired(timestamps, window_start)
+        current_count = len(timestamps)
 
     return {
         "enabled": True,
-        "limit": settings.RATE_LIMIT_REQUESTS,
-        "remaining": max(0, settings.RATE_LIMIT_REQUESTS - current_count),
+        "limit": _RL_LIMIT,
+        "remaining": max(0, _RL_LIMIT - current_count),
         "reset_seconds": 60,
     }
 
@@ -110,15 +121,13 @@ def cleanup_expired_records() -> int:
     Returns:
         清理的客户端数量
     """
-    now = datetime.now()
-    window_start = now - timedelta(minutes=1)
+    window_start = time.monotonic() - _WINDOW_SECONDS
     cleaned = 0
 
     for client_id in list(_request_counts.keys()):
-        _request_counts[client_id] = [
-            t for t in _request_counts[client_id] if t > window_start
-        ]
-        if not _request_counts[client_id]:
+        timestamps = _request_counts[client_id]
+        _evict_expired(timestamps, window_start)
+        if not timestamps:
             del _request_counts[client_id]
             cleaned += 1
 
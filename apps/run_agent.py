@@ -22,8 +22,14 @@ import os
 import re
 import time
 import json
+import unicodedata
 from datetime import datetime
-from typing import Dict, Any, Optional, Union
+from pathlib import Path
+from functools import lru_cache
+from collections import deque
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple, Union, cast
+
+import orjson
 
 # 改进的输入处理（使用标准 input，prompt_toolkit 可选）
 # 如果需要更好的编辑体验，可以安装: pip install prompt_toolkit
@@ -44,10 +50,17 @@ if settings.LANGCHAIN_TRACING_V2:
 # 输出函数（无颜色无emoji）
 # ============================================================
 
+# 输出前缀（批量拼装输出时直接引用，避免逐行调用打印函数）
+_HEADER_RULE = "=" * 65
+_WARNING_PREFIX = "  [警告] "
+_INFO_PREFIX = "  [信息] "
+_DIM_PREFIX = "  "
+
+
 def print_header(text: str):
-    print(f"\n{'='*65}")
+    print(f"\n{_HEADER_RULE}")
     print(f" {text}")
-    print(f"{'='*65}\n")
+    print(f"{_HEADER_RULE}\n")
 
 
 def print_subheader(text: str):
@@ -89,7 +102,7 @@ def print_fsm(state: str, transition: Optional[str] = None):
 
 
 def print_warning(text: str):
-    print(f"  [警告] {text}")
+    print(f"{_WARNING_PREFIX}{text}")
 
 
 def print_success(text: str):
@@ -97,11 +110,17 @@ def print_success(text: str):
 
 
 def print_info(text: str):
-    print(f"  [信息] {text}")
+    print(f"{_INFO_PREFIX}{text}")
+
+
+def print_info_lines(lines: List[str]):
+    """批量输出多条 [信息]，合并为一次 stdout 写入"""
+    if lines:
+        sys.stdout.write("".join(f"{_INFO_PREFIX}{line}\n" for line in lines))
 
 
 def print_dim(text: str):
-    print(f"  {text}")
+    print(f"{_DIM_PREFIX}{text}")
 
 
 def _load_radiotelephony_rules() -> Dict[str, Any]:
@@ -204,6 +223,18 @@ def _spell_letters(letter_text: str, letters_map: Dict[str, str]) -> str:
     return " ".join(spelled).strip()
 
 
+def _build_terms_pattern(terms: Dict[str, str]) -> Optional[re.Pattern]:
+    """把所有术语合并成单个交替正则（长词优先），一次扫描完成替换"""
+    if not terms:
+        return None
+    alternation = "|".join(re.escape(term) for term in sorted(terms.keys(), key=len, reverse=True))
+    return re.compile(rf"({alternation})\s*([A-Za-z]+)?\s*(\d+)")
+
+
+_TERMS_RE = _build_terms_pattern(_RADIOTELEPHONY_RULES.get("terms", {}))
+
+
+@lru_cache(maxsize=1024)
 def format_radiotelephony_readout(text: str) -> Optional[str]:
     """根据规则把输入转成航空读法（用于展示/播报与解析）"""
     rules = _RADIOTELEPHONY_RULES
@@ -213,25 +244,22 @@ def format_radiotelephony_readout(text: str) -> Optional[str]:
     terms = rules.get("terms", {})
     digits_map = rules.get("digits", {})
     letters_map = rules.get("letters", {})
-    if not (terms and digits_map):
+    if not (terms and digits_map) or _TERMS_RE is None:
         return None
 
-    result = text
-    for term in sorted(terms.keys(), key=len, reverse=True):
-        pattern = rf"{re.escape(term)}\s*([A-Za-z]+)?\s*(\d+)"
-
-        def _replace(match: re.Match) -> str:
-            letters_part = match.group(1) or ""
-            digits_part = match.group(2)
-            spoken_letters = _spell_letters(letters_part, letters_map) if letters_part else ""
-            spoken_digits = _spell_digits(digits_part, digits_map)
+    def _replace(match: re.Match) -> str:
+        term = match.group(1)
+        letters_part = match.group(2) or ""
+        digits_part = match.group(3)
+        spoken_letters = _spell_letters(letters_part, letters_map) if letters_part else ""
+        spoken_digits = _spell_digits(digits_part, digits_map)
 
-            spoken = terms.get(term, term)
-            if spoken_letters:
-                spoken = f"{spoken} {spoken_letters}"
-            return f"{spoken} {spoken_digits}".strip()
+        spoken = terms.get(term, term)
+        if spoken_letters:
+            spoken = f"{spoken} {spoken_letters}"
+        return f"{spoken} {spoken_digits}".strip()
 
-        result = re.sub(pattern, _replace, result)
+    result = _TERMS_RE.sub(_replace, text)
 
     return result if result != text else None
 
@@ -262,18 +290,21 @@ def get_user_input(prompt: str = "机长") -> str:
 # 状态显示
 # ============================================================
 
+# Checklist 字段显示名
+_CHECKLIST_FIELD_NAMES = {
+    "fluid_type": "油液类型",
+    "continuous": "持续泄漏",
+    "engine_status": "发动机状态",
+    "position": "事发位置",
+    "leak_size": "泄漏面积",
+}
+
+
 def print_checklist(checklist: Dict[str, bool]):
     """打印 Checklist 状态"""
     print(f"\n信息收集 Checklist:")
-    field_names = {
-        "fluid_type": "油液类型",
-        "continuous": "持续泄漏",
-        "engine_status": "发动机状态",
-        "position": "事发位置",
-        "leak_size": "泄漏面积",
-    }
     for field, collected in checklist.items():
-        name = field_names.get(field, field)
+        name = _CHECKLIST_FIELD_NAMES.get(field, field)
         status = "[v]" if collected else "[x]"
         print(f"  {status} {name}")
 
@@ -376,7 +407,10 @@ def print_state_summary(state: Dict[str, Any]):
 # ============================================================
 
 # 导入 input_parser 中的混合实体提取函数
-from agent.nodes.input_parser import extract_entities_hybrid, build_history_context
+from agent.nodes.input_parser import extract_entities_hybrid, build_history_context, identify_scenario
+from agent.nodes.output_generator import output_generator_node
+from agent.state import FSMState, create_initial_state
+from tools.information.flight_plan_lookup import FlightPlanLookupTool
 
 
 def extract_all_entities(text: str, history: str = "") -> Dict[str, Any]:
@@ -384,48 +418,236 @@ def extract_all_entities(text: str, history: str = "") -> Dict[str, Any]:
     return extract_entities_hybrid(text, history)
 
 
+class KeywordAutomaton:
+    """
+    Aho-Corasick 多模式匹配自动机
+
+    每个关键词绑定一个 (分组, 取值) 标签，一次线性扫描即可得到文本中
+    出现的全部标签（包括相互重叠的关键词）。
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Tuple[str, Any]]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Any]]] = [[]]
+
+        for keyword, tag in entries:
+            node = 0
+            for ch in keyword:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(tag)
+
+        # BFS 构建失败指针，并把后缀节点的输出合并进来
+        order: List[int] = []
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child].extend(self._output[self._fail[child]])
+
+        # 展开失败指针得到完整的 DFA 转移表，扫描时每个字符只需一次字典查找
+        self._delta: List[Dict[str, int]] = [{} for _ in self._goto]
+        self._delta[0] = dict(self._goto[0])
+        for node in order:
+            self._delta[node] = {**self._delta[self._fail[node]], **self._goto[node]}
+
+    def match(self, text: str) -> Set[Tuple[str, Any]]:
+        """返回文本中命中的全部标签"""
+        delta = self._delta
+        output = self._output
+        found: Set[Tuple[str, Any]] = set()
+        node = 0
+        for ch in text:
+            node = delta[node].get(ch, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+def _nfkc(text: str) -> str:
+    """NFKC 规范化并转小写，统一全角/半角及兼容字符"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+# 跳过/不确定回答关键词（关键词与用户输入都按 _nfkc 规范化后再匹配）
+_SKIP_KEYWORDS = (
+    "不确定", "不知道", "暂不确定", "后续补充", "待确认",
+    "跳过", "跳过这个", "skip", "unknown", "unsure",
+    "这个不重要", "先继续", "后面再说", "待定",
+)
+
+_SKIP_TAG = ("skip", True)
+
+# pending_field 关键词表：字段 -> [(取值, 关键词), ...]，按优先级排列
+_FIELD_VALUE_KEYWORDS: Dict[str, Tuple[Tuple[Union[str, bool], Tuple[str, ...]], ...]] = {
+    "engine_status": (
+        ("STOPPED", ("关车", "关闭", "关", "停车", "熄火", "停了", "停止", "已关", "已停")),
+        ("RUNNING", ("运转", "运行", "转", "工作", "启动", "在转", "慢车", "启动中")),
+    ),
+    "continuous": (
+        (True, ("是", "有", "持续", "还在", "不断", "一直", "在漏", "滴漏", "流淌")),
+        (False, ("没", "不", "没有", "停止", "止住", "停了", "已停", "没了", "关闭")),
+    ),
+    "leak_size": (
+        ("LARGE", ("大", "很大", "大量", ">5", "5㎡")),
+        ("MEDIUM", ("中", "一般", "1-5")),
+        ("SMALL", ("小", "少量", "一点", "<1")),
+    ),
+    "fluid_type": (
+        ("FUEL", ("燃油", "航油", "油料", "jet", "fuel", "漏油", "煤油")),
+        ("HYDRAULIC", ("液压油", "液压", "hydraulic")),
+        ("OIL", ("滑油", "机油", "润滑油", "oil")),
+    ),
+}
+
+# 否定词：出现时抑制 continuous=True
+_NEGATION_TAG = ("negation", "不")
+
+# (字段, 取值) -> 抑制该取值的标签
+_FIELD_VALUE_GUARDS: Dict[Tuple[str, Any], Tuple[str, Any]] = {
+    ("continuous", True): _NEGATION_TAG,
+}
+
+# pending_field=position 的位置提取正则
+_POS_NUM = re.compile(r"\b(\d{2,3})\b")
+_POS_ALNUM = re.compile(r"\b([A-Z]\d+)\b")
+_POS_TWY = re.compile(r"(\d+)\s*(?:滑行道|跑道|twy|rwy)", re.IGNORECASE)
+
+
+def _build_keyword_automaton() -> KeywordAutomaton:
+    entries: List[Tuple[str, Tuple[str, Any]]] = [(_nfkc(kw), _SKIP_TAG) for kw in _SKIP_KEYWORDS]
+    for field, value_keywords in _FIELD_VALUE_KEYWORDS.items():
+        for value, keywords in value_keywords:
+            entries.extend((_nfkc(kw), (field, value)) for kw in keywords)
+    entries.append((_nfkc("不"), _NEGATION_TAG))
+    return KeywordAutomaton(entries)
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+# 简单是/否、肯定/否定回答词表
+_YES_ANSWERS = frozenset(map(_nfkc, {"是", "是的", "对", "yes", "y", "有", "在", "还在", "确定", "没错"}))
+_NO_ANSWERS = frozenset(map(_nfkc, {"否", "不", "没有", "no", "n", "不是", "没", "无"}))
+_AFFIRMATIVE_ANSWERS = frozenset(
+    map(_nfkc, {"是", "是的", "对", "yes", "y", "确定", "没错", "对的", "正确", "sure"})
+)
+_NEGATIVE_ANSWERS = frozenset(map(_nfkc, {"否", "不", "不是", "no", "n", "错了", "不对"}))
+
+
 def parse_simple_yes_no(text: str) -> Optional[bool]:
     """解析简单的是/否回答"""
-    text = text.strip().lower()
-    if text in ["是", "是的", "对", "yes", "y", "有", "在", "还在", "确定", "没错"]:
+    text = _nfkc(text.strip())
+    if text in _YES_ANSWERS:
         return True
-    elif text in ["否", "不", "没有", "no", "n", "不是", "没", "无"]:
+    elif text in _NO_ANSWERS:
         return False
     return None
 
 
 def is_affirmative(text: str) -> bool:
     """检查文本是否是肯定回答（用于确认问题）"""
-    text = text.strip().lower()
-    return text in ["是", "是的", "对", "yes", "y", "确定", "没错", "对的", "正确", "sure"]
+    text = _nfkc(text.strip())
+    return text in _AFFIRMATIVE_ANSWERS
 
 
 def is_negative(text: str) -> bool:
     """检查文本是否是否定回答"""
-    text = text.strip().lower()
-    return text in ["否", "不", "不是", "no", "n", "错了", "不对", "不对"]
+    text = _nfkc(text.strip())
+    return text in _NEGATIVE_ANSWERS
 
 
 def is_skip_or_unknown(text: str) -> bool:
     """检查文本是否是跳过/不确定回答"""
-    text = text.strip().lower()
-    skip_patterns = [
-        "不确定", "不知道", "暂不确定", "后续补充", "待确认",
-        "跳过", "跳过这个", "skip", "unknown", "unsure",
-        "这个不重要", "先继续", "后面再说", "待定",
-    ]
-    return any(pattern in text for pattern in skip_patterns)
+    text = _nfkc(text.strip())
+    return _SKIP_TAG in _KEYWORD_AUTOMATON.match(text)
+
+
+_COMPLETENESS_RE = re.compile(
+    "|".join(
+        map(
+            lambda pattern: re.escape(_nfkc(pattern)),
+            [
+                "收集完了吗", "信息齐了吗", "可以了吗", "还有问题吗",
+                "还有要问的吗", "可以生成报告了吗", "结束了吗",
+                "complete", "enough", "sufficient",
+            ],
+        )
+    ),
+    re.IGNORECASE,
+)
 
 
 def is_completeness_question(text: str) -> bool:
     """检查是否是在问信息是否收集完整"""
-    text = text.strip().lower()
-    patterns = [
-        "收集完了吗", "信息齐了吗", "可以了吗", "还有问题吗",
-        "还有要问的吗", "可以生成报告了吗", "结束了吗",
-        "complete", "enough", "sufficient",
-    ]
-    return any(pattern in text for pattern in patterns)
+    text = _nfkc(text.strip())
+    return _COMPLETENESS_RE.search(text) is not None
+
+
+# 报告确认环节：用户表示无需补充、确认结束的回复
+_CONFIRM_END_WORDS = frozenset({"y", "yes", "是", "确认", "没有", "无", "结束", "ok", "好的", "可以", "完毕"})
+# 否定词 + 补充类词语同时出现（如“没有其他问题”“无信息补充”）
+_CONFIRM_END_NEGATION_RE = re.compile("没|无|不")
+_CONFIRM_END_TOPIC_RE = re.compile("补充|其他|问题|情况|要说|要补|要报")
+
+
+def is_confirm_end(cmd: str) -> bool:
+    """检查报告确认环节的回复是否表示确认结束（cmd 为小写去空白后的输入）"""
+    if cmd in _CONFIRM_END_WORDS:
+        return True
+    return (
+        _CONFIRM_END_NEGATION_RE.search(cmd) is not None
+        and _CONFIRM_END_TOPIC_RE.search(cmd) is not None
+    )
+
+
+# 航班计划表数据行：callsign | inorout | stand | runway [| eldt | etot ...]
+_FLIGHT_ROW_RE = re.compile(
+    r"^(?!-)([^|\n]*)\|([^|\n]*)\|([^|\n]*)\|([^|\n]*)(?:\|([^|\n]*)\|([^|\n]*))?",
+    re.MULTILINE,
+)
+
+# 图节点显示名
+_NODE_DISPLAY_NAMES = {
+    "input_parser": "输入解析",
+    "reasoning": "ReAct 推理",
+    "tool_executor": "工具执行",
+    "fsm_validator": "FSM 验证",
+    "output_generator": "报告生成",
+}
+
+# input_parser 节点展示的事件字段（按固定顺序）
+_INCIDENT_DISPLAY_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("fluid_type", "油液类型"),
+    ("position", "位置"),
+    ("engine_status", "发动机"),
+    ("continuous", "持续泄漏"),
+    ("leak_size", "面积"),
+    ("flight_no", "航班号"),
+)
+
+# input_parser observation 中实体提取结果的前缀
+_EXTRACTED_ENTITIES_MARKER = "提取实体:"
+
+# 会向用户发问的询问工具
+_ASK_ACTIONS = frozenset({"ask_for_detail", "smart_ask"})
+
+# 占位答案标记（final_answer 含这些字样时表示仍在等待用户回复）
+_WAITING_ANSWER_RE = re.compile("等待用户|等待回复")
 
 
 # ============================================================
@@ -443,13 +665,27 @@ class AgentRunner:
         self.llm_client = None
         self.last_assistant_message = ""
         self._pre_last_assistant = ""
+        # 最近一条 assistant 消息缓存：(消息列表对象, 已扫描长度, 内容)
+        self._assistant_cache_messages: Optional[list] = None
+        self._assistant_cache_len = 0
+        self._cached_last_assistant = ""
+        self._flight_plan_tool: Optional[FlightPlanLookupTool] = None
+        self._agent_config: Dict[str, Any] = {}  # initialize() 时填充
+        # 非交互终端（输出被重定向）或设置 AERO_QUIET=1 时跳过节点详情展示
+        self._verbose = sys.stdout.isatty() and os.environ.get("AERO_QUIET") != "1"
+        # _is_waiting_answer 缓存：最近检查过的 final_answer 及结果
+        self._waiting_checked_answer: Optional[str] = None
+        self._waiting_flag: bool = False
 
     def _is_waiting_answer(self) -> bool:
-        """判断是否为等待用户回复的占位答案"""
+        """判断是否为等待用户回复的占位答案（同一答案只扫描一次）"""
         answer = self.state.get("final_answer", "")
         if not answer:
             return False
-        return "等待用户" in answer or "等待回复" in answer
+        if answer is not self._waiting_checked_answer:
+            self._waiting_checked_answer = answer
+            self._waiting_flag = _WAITING_ANSWER_RE.search(answer) is not None
+        return self._waiting_flag
 
     def initialize(self):
         """初始化 Agent"""
@@ -469,14 +705,17 @@ class AgentRunner:
             register_all_tools()
 
             # 导入 LangGraph Agent
-            from agent.graph import compile_agent
+            from agent.graph import compile_agent, get_agent_config
             self.langgraph_agent = compile_agent()
+            self._agent_config = dict(get_agent_config())
             print_info("LangGraph Agent 已加载")
 
             # 测试 LLM 连接
             from config.llm_config import get_llm_client
             self.llm_client = get_llm_client()
 
+            self._flight_plan_tool = FlightPlanLookupTool()
+
             print_success("Agent 初始化完成")
 
             # 打印 LangSmith 状态
@@ -499,9 +738,6 @@ class AgentRunner:
 
     def start_session(self, initial_message: str) -> bool:
         """开始新会话"""
-        from agent.state import create_initial_state
-        from agent.nodes.input_parser import identify_scenario
-
         # 自动识别场景类型（基于初始消息）
         detected_scenario = identify_scenario(initial_message)
 
@@ -527,61 +763,28 @@ class AgentRunner:
 
         当用户回答具体值（如"关车"、"运转"）但未被正则匹配时使用
         """
-        text = message.strip().lower()
-
-        if field == "engine_status":
-            # 发动机状态关键词
-            stopped_keywords = ["关车", "关闭", "关", "停车", "熄火", "停了", "停止", "已关", "已停"]
-            running_keywords = ["运转", "运行", "转", "工作", "启动", "在转", "慢车", "启动中"]
-            for kw in stopped_keywords:
-                if kw in text:
-                    return "STOPPED"
-            for kw in running_keywords:
-                if kw in text:
-                    return "RUNNING"
-
-        elif field == "continuous":
-            # 持续性关键词
-            true_keywords = ["是", "有", "持续", "还在", "不断", "一直", "在漏", "滴漏", "流淌"]
-            false_keywords = ["没", "不", "没有", "停止", "止住", "停了", "已停", "没了", "关闭"]
-            for kw in true_keywords:
-                if kw in text and "不" not in text:
-                    return True
-            for kw in false_keywords:
-                if kw in text:
-                    return False
+        text = _nfkc(message.strip())
 
-        elif field == "leak_size":
-            # 面积关键词
-            if any(kw in text for kw in ["大", "很大", "大量", ">5", "5㎡"]):
-                return "LARGE"
-            elif any(kw in text for kw in ["中", "一般", "1-5"]):
-                return "MEDIUM"
-            elif any(kw in text for kw in ["小", "少量", "一点", "<1"]):
-                return "SMALL"
-
-        elif field == "fluid_type":
-            # 油液类型关键词
-            if any(kw in text for kw in ["燃油", "航油", "油料", "jet", "fuel", "漏油", "煤油"]):
-                return "FUEL"
-            elif any(kw in text for kw in ["液压油", "液压", "hydraulic"]):
-                return "HYDRAULIC"
-            elif any(kw in text for kw in ["滑油", "机油", "润滑油", "oil"]):
-                return "OIL"
-
-        elif field == "position":
+        value_keywords = _FIELD_VALUE_KEYWORDS.get(field)
+        if value_keywords:
+            tags = _KEYWORD_AUTOMATON.match(text)
+            for value, _ in value_keywords:
+                tag = (field, value)
+                if tag in tags and _FIELD_VALUE_GUARDS.get(tag) not in tags:
+                    return value
+
+        if field == "position":
             # 位置关键词 - 尝试提取纯数字或字母+数字
-            import re
             # 匹配 2-3 位数字（机位号）
-            match = re.search(r'\b(\d{2,3})\b', text)
+            match = _POS_NUM.search(text)
             if match:
                 return match.group(1)
             # 匹配字母+数字（如 A3, W2）
-            match = re.search(r'\b([A-Z]\d+)\b', text.upper())
+            match = _POS_ALNUM.search(text.upper())
             if match:
                 return match.group(1)
             # 匹配数字+滑行道/跑道
-            match = re.search(r'(\d+)\s*(?:滑行道|跑道|twy|rwy)', text)
+            match = _POS_TWY.search(text)
             if match:
                 return match.group(1)
 
@@ -589,28 +792,29 @@ class AgentRunner:
 
     def run_step(self) -> Dict[str, Any]:
         """执行一次 LangGraph invoke"""
-        if not self.state:
+        state = self.state
+        if not state:
             return {"status": "error", "message": "状态未初始化"}
 
         # 检查是否完成
-        if self.state.get("is_complete"):
+        if state.get("is_complete"):
             return {
                 "status": "completed",
-                "report": self.state.get("final_report", {}),
-                "answer": self.state.get("final_answer", ""),
+                "report": state.get("final_report", {}),
+                "answer": state.get("final_answer", ""),
             }
-        if self.state.get("fsm_state") == "COMPLETED":
+        if state.get("fsm_state") == "COMPLETED":
             if (
-                self.state.get("scenario_type") == "oil_spill"
-                and not self.state.get("supplemental_prompted")
-                and not self.state.get("report_generated")
+                state.get("scenario_type") == "oil_spill"
+                and not state.get("supplemental_prompted")
+                and not state.get("report_generated")
             ):
                 pass
             else:
                 return {
                     "status": "completed",
-                    "report": self.state.get("final_report", {}),
-                    "answer": self.state.get("final_answer", ""),
+                    "report": state.get("final_report", {}),
+                    "answer": state.get("final_answer", ""),
                 }
 
         try:
@@ -619,19 +823,17 @@ class AgentRunner:
             self._pre_last_assistant = pre_last_assistant
             if pre_last_assistant:
                 self.last_assistant_message = pre_last_assistant
-            pre_message_count = len(self.state.get("messages", []))
+            pre_message_count = len(state.get("messages", []))
 
             # 使用 stream 来显示中间步骤
-            # 导入配置
-            from agent.graph import get_agent_config
-            agent_config = get_agent_config()
+            agent_config = self._agent_config
 
-            for chunk in self.langgraph_agent.stream(self.state, config=agent_config):
+            for chunk in self.langgraph_agent.stream(state, config=agent_config):
                 # chunk 是一个字典，key 是节点名，value 是该节点的输出
                 for node_name, node_output in chunk.items():
-                    # 更新状态
+                    # 原地合并节点输出（节点可能整体替换 messages 列表，不缓存其引用）
                     if isinstance(node_output, dict):
-                        self.state.update(node_output)
+                        state.update(node_output)
 
                     # 显示节点执行结果
                     if node_name == "input_parser" and node_output:
@@ -654,12 +856,17 @@ class AgentRunner:
             # stream 结束后 self.state 已经是最新的了
             self._maybe_save_advice_report({})
 
+            # 快照本轮频繁读取的状态
+            is_complete = state.get("is_complete")
+            final_answer = state.get("final_answer", "")
+            is_waiting = self._is_waiting_answer()
+
             # 检查报告是否已生成但等待用户确认
-            if self.state.get("report_generated") and not self.state.get("is_complete"):
+            if state.get("report_generated") and not is_complete:
                 question = self._get_latest_assistant_message()
                 if not question:
                     # 如果没有获取到消息，使用默认询问
-                    incident = self.state.get("incident", {})
+                    incident = state.get("incident", {})
                     flight_no = incident.get("flight_no_display") or incident.get("flight_no") or ""
                     question = f"{flight_no}，处置流程已完成。你还有什么需要补充的吗？" if flight_no else "处置流程已完成。你还有什么需要补充的吗？"
                 return {
@@ -668,41 +875,48 @@ class AgentRunner:
                 }
 
             # 已完成直接返回
-            if self.state.get("is_complete") or (self.state.get("final_answer") and not self._is_waiting_answer()):
+            if is_complete or (final_answer and not is_waiting):
                 return {
                     "status": "completed",
-                    "report": self.state.get("final_report", {}),
-                    "answer": self.state.get("final_answer", ""),
+                    "report": state.get("final_report", {}),
+                    "answer": final_answer,
                 }
 
             # 等待用户回复
-            if self.state.get("awaiting_user") or self._is_waiting_answer():
+            if state.get("awaiting_user") or is_waiting:
                 question = self._get_latest_assistant_message()
 
                 # 检查是否出现重复提问（基于消息历史而非简单文本比较）
-                duplicate_count = self.state.get("_duplicate_question_count", 0)
-                last_asked_question = self.state.get("_last_asked_question", "")
+                duplicate_count = state.get("_duplicate_question_count", 0)
+                question_hash = hash(question) if question else None
 
-                if question and question == last_asked_question:
+                # 先比较哈希，命中后再做完整字符串比较以排除碰撞
+                if (
+                    question_hash is not None
+                    and question_hash == state.get("_last_asked_question_hash")
+                    and question == state.get("_last_asked_question", "")
+                ):
                     # 如果是相同问题，增加计数器
                     duplicate_count += 1
-                    self.state["_duplicate_question_count"] = duplicate_count
+                    state["_duplicate_question_count"] = duplicate_count
 
                     # 如果重复次数过多（超过3次），重置状态并继续推理
                     if duplicate_count >= 3:
                         print_warning("检测到重复提问超过3次，重置状态并重新评估...")
-                        self.state["_duplicate_question_count"] = 0
-                        self.state["_last_asked_question"] = ""
-                        self.state["pending_question"] = None
-                        self.state["pending_field"] = None
+                        state["_duplicate_question_count"] = 0
+                        state["_last_asked_question"] = ""
+                        state["_last_asked_question_hash"] = None
+                        state["pending_question"] = None
+                        state["pending_field"] = None
                         # 清除awaiting标志，让系统重新进入推理
-                        self.state["awaiting_user"] = False
+                        state["awaiting_user"] = False
                         # 继续循环，让系统重新评估状态
                         return {"status": "continue"}
                 else:
                     # 新问题，重置计数器
-                    self.state["_duplicate_question_count"] = 1
-                    self.state["_last_asked_question"] = question or ""
+                    state["_duplicate_question_count"] = 1
+                    state["_last_asked_question"] = question or ""
+                    state["_last_asked_question_hash"] = question_hash
 
                 if question:
                     self.last_assistant_message = question
@@ -713,7 +927,7 @@ class AgentRunner:
                 }
 
             # 检查是否出现新的 assistant 提问
-            messages = self.state.get("messages", [])
+            messages = state.get("messages", [])
             if len(messages) > pre_message_count:
                 question = self._get_latest_assistant_message()
                 if question and question != pre_last_assistant:
@@ -725,9 +939,9 @@ class AgentRunner:
                     }
 
             # 检查错误
-            if self.state.get("error"):
-                error_msg = self.state["error"]
-                self.state["error"] = ""
+            if state.get("error"):
+                error_msg = state["error"]
+                state["error"] = ""
                 return {"status": "error", "message": error_msg}
 
             return {"status": "continue"}
@@ -765,50 +979,92 @@ class AgentRunner:
         # 重置重复提问相关状态
         self.state["_duplicate_question_count"] = 0
         self.state["_last_asked_question"] = ""
+        self.state["_last_asked_question_hash"] = None
 
     def _get_latest_assistant_message(self) -> str:
-        """获取最近一条 assistant 消息"""
-        messages = self.state.get("messages", [])
-        for msg in reversed(messages):
+        """获取最近一条 assistant 消息（只扫描上次缓存之后新增的消息）"""
+        messages: List[Dict[str, Any]] = self.state.get("messages", [])
+        latest: str
+        if messages is self._assistant_cache_messages and len(messages) >= self._assistant_cache_len:
+            start: int = self._assistant_cache_len
+            latest = self._cached_last_assistant
+        else:
+            # 消息列表被节点整体替换，需要完整扫描
+            start = 0
+            latest = ""
+
+        for msg in reversed(messages[start:]):
             if msg.get("role") == "assistant":
-                return str(msg.get("content", ""))
-        return ""
+                latest = str(msg.get("content", ""))
+                break
+
+        self._assistant_cache_messages = messages
+        self._assistant_cache_len = len(messages)
+        self._cached_last_assistant = latest
+        return latest
 
     def _print_flight_plan_brief(self, table: str, incident: Dict[str, Any]):
         """简洁格式打印航班计划"""
-        # 解析表格提取关键信息
-        lines = table.strip().split("\n")
-        if len(lines) < 3:
+        # 跳过表头和分隔线，直接匹配第一条数据行
+        table = table.strip()
+        header_end = table.find("\n")
+        body_start = table.find("\n", header_end + 1) if header_end != -1 else -1
+        if body_start == -1:
             print_dim(f"  {table}")
             return
 
-        # 跳过表头和分隔线，取数据行
-        data_lines = [l for l in lines[2:] if l.strip() and not l.startswith("-")]
-        if not data_lines:
+        match = _FLIGHT_ROW_RE.search(table, body_start + 1)
+        if not match:
             return
 
-        # 解析第一行数据
-        row = data_lines[0]
-        parts = [p.strip() for p in row.split("|")]
-        if len(parts) >= 4:
-            callsign = parts[0] if parts[0] else "N/A"
-            inorout = "出发" if parts[1] == "D" else "到达" if parts[1] == "A" else parts[1]
-            stand = parts[2] if parts[2] else "N/A"
-            runway = parts[3] if parts[3] else "N/A"
-
-            # 提取时间（优先显示计划时间）
-            time_str = ""
-            if len(parts) >= 6:
-                etot = parts[5].strip() if len(parts) > 5 else ""  # 计划起飞
-                eldt = parts[4].strip() if len(parts) > 4 else ""  # 计划落地
-                if inorout == "出发" and etot:
-                    time_str = f"计划起飞 {etot.split(' ')[1] if ' ' in etot else etot}"
-                elif inorout == "到达" and eldt:
-                    time_str = f"计划落地 {eldt.split(' ')[1] if ' ' in eldt else eldt}"
-
-            print_dim(f"  呼号: {callsign} | 类型: {inorout} | 机位: {stand} | 跑道: {runway}")
-            if time_str:
-                print_dim(f"  {time_str}")
+        callsign, inorout, stand, runway, eldt, etot = (
+            (group or "").strip() for group in match.groups()
+        )
+        callsign = callsign or "N/A"
+        inorout = "出发" if inorout == "D" else "到达" if inorout == "A" else inorout
+        stand = stand or "N/A"
+        runway = runway or "N/A"
+
+        # 提取时间（优先显示计划时间）
+        time_str = ""
+        if inorout == "出发" and etot:
+            time_str = f"计划起飞 {etot.split(' ')[1] if ' ' in etot else etot}"
+        elif inorout == "到达" and eldt:
+            time_str = f"计划落地 {eldt.split(' ')[1] if ' ' in eldt else eldt}"
+
+        print_dim(f"  呼号: {callsign} | 类型: {inorout} | 机位: {stand} | 跑道: {runway}")
+        if time_str:
+            print_dim(f"  {time_str}")
+
+    def _resolve_flight_plan(self, output: Dict[str, Any], incident: Dict[str, Any]) -> Optional[str]:
+        """首次获取航班计划时更新状态，返回需要展示的航班计划表（无需展示时返回 None）"""
+        if self.state.get("_flight_plan_displayed"):
+            return None
+        flight_plan_table = output.get("flight_plan_table") or self.state.get("flight_plan_table")
+        if flight_plan_table:
+            self.state["_flight_plan_displayed"] = True
+            return cast(str, flight_plan_table)
+        if self.state.get("flight_plan_checked"):
+            return None
+
+        # Fallback: 如果没有从 auto_enrichment 获取到，手动查询一次
+        flight_no = incident.get("flight_no") or incident.get("flight_no_display")
+        if not flight_no:
+            return None
+        try:
+            if self._flight_plan_tool is None:
+                self._flight_plan_tool = FlightPlanLookupTool()
+            result = self._flight_plan_tool.execute(incident, {"flight_no": flight_no})
+            table = result.get("flight_plan_table")
+            if table:
+                self.state["flight_plan_table"] = table
+                self.state["_flight_plan_displayed"] = True
+                return cast(str, table)
+        except Exception:
+            pass
+        finally:
+            self.state["flight_plan_checked"] = True
+        return None
 
     def _should_pause_for_input(self) -> bool:
         """检查是否应该暂停等待用户输入"""
@@ -816,51 +1072,51 @@ class AgentRunner:
 
     def _display_node_start(self, node_name: str):
         """显示节点开始执行"""
-        node_names = {
-            "input_parser": "输入解析",
-            "reasoning": "ReAct 推理",
-            "tool_executor": "工具执行",
-            "fsm_validator": "FSM 验证",
-            "output_generator": "报告生成",
-        }
-        name = node_names.get(node_name, node_name)
+        if not self._verbose:
+            return
+        name = _NODE_DISPLAY_NAMES.get(node_name, node_name)
         print(f"\n[{name}]")
 
     def _display_node_result(self, node_name: str, output: Dict[str, Any]):
         """显示节点执行结果"""
+        # 航班计划查询会写入 state，无论是否展示都需执行
+        flight_plan_table = None
+        if node_name == "input_parser":
+            flight_plan_table = self._resolve_flight_plan(output, output.get("incident", {}))
+
+        if not self._verbose:
+            # 不展示时仍需保留综合评估报告的落盘
+            if node_name == "tool_executor":
+                self._maybe_save_advice_report(output)
+            return
 
         if node_name == "input_parser":
             incident = output.get("incident", {})
+            info: List[str] = []
             extracted = []
-            field_names = {
-                "fluid_type": "油液类型",
-                "position": "位置",
-                "engine_status": "发动机",
-                "continuous": "持续泄漏",
-                "leak_size": "面积",
-                "flight_no": "航班号",
-            }
             # 只显示本次提取的字段（如果有reasoning_steps记录的话）
             reasoning_steps = output.get("reasoning_steps", [])
-            if reasoning_steps and len(reasoning_steps) > 0:
-                last_step = reasoning_steps[-1]
-                if "提取实体:" in last_step.get("observation", ""):
-                    # 从observation中提取实体信息并显示
-                    obs = last_step.get("observation", "")
-                    if "提取实体:" in obs:
-                        entities_str = obs.split("提取实体:")[1].split("\n")[0].strip()
-                        print_info(f"本次提取: {entities_str}")
+            if reasoning_steps:
+                # 从最后一步 observation 中截取实体信息并显示
+                obs = reasoning_steps[-1].get("observation", "")
+                idx = obs.find(_EXTRACTED_ENTITIES_MARKER)
+                if idx >= 0:
+                    start = idx + len(_EXTRACTED_ENTITIES_MARKER)
+                    end = obs.find("\n", start)
+                    entities_str = obs[start:end if end >= 0 else None].strip()
+                    info.append(f"本次提取: {entities_str}")
 
             # 显示当前incident的完整状态
-            for k, v in incident.items():
-                if v is not None and k in field_names:
-                    name = field_names.get(k, k)
-                    if k == "position" and incident.get("position_display"):
-                        extracted.append(f"{name}={incident['position_display']}")
-                    else:
-                        extracted.append(f"{name}={v}")
+            for k, name in _INCIDENT_DISPLAY_FIELDS:
+                v = incident.get(k)
+                if v is None:
+                    continue
+                if k == "position" and incident.get("position_display"):
+                    extracted.append(f"{name}={incident['position_display']}")
+                else:
+                    extracted.append(f"{name}={v}")
             if extracted:
-                print_info(f"已收集信息: {', '.join(extracted)}")
+                info.append(f"已收集信息: {', '.join(extracted)}")
 
             # 显示气象信息
             weather = output.get("weather", {})
@@ -874,63 +1130,46 @@ class AgentRunner:
                 if weather.get("temperature") is not None:
                     weather_parts.append(f"温度: {weather['temperature']:.1f}°C")
                 if weather_parts:
-                    print_info(f"气象条件: {', '.join(weather_parts)}")
+                    info.append(f"气象条件: {', '.join(weather_parts)}")
 
             # 仅在首次获取时显示航班计划（避免重复）
-            if not self.state.get("_flight_plan_displayed"):
-                flight_plan_table = output.get("flight_plan_table") or self.state.get("flight_plan_table")
-                if flight_plan_table:
-                    self.state["_flight_plan_displayed"] = True
-                    print_info("航班计划:")
-                    self._print_flight_plan_brief(flight_plan_table, incident)
-                elif not self.state.get("flight_plan_checked"):
-                    # Fallback: 如果没有从 auto_enrichment 获取到，手动查询一次
-                    flight_no = incident.get("flight_no") or incident.get("flight_no_display")
-                    if flight_no:
-                        try:
-                            from tools.information.flight_plan_lookup import FlightPlanLookupTool
-                            tool = FlightPlanLookupTool()
-                            result = tool.execute(incident, {"flight_no": flight_no})
-                            table = result.get("flight_plan_table")
-                            if table:
-                                self.state["flight_plan_table"] = table
-                                self.state["_flight_plan_displayed"] = True
-                                print_info("航班计划:")
-                                self._print_flight_plan_brief(table, incident)
-                        except Exception:
-                            pass
-                        finally:
-                            self.state["flight_plan_checked"] = True
+            if flight_plan_table:
+                info.append("航班计划:")
+                print_info_lines(info)
+                info.clear()
+                self._print_flight_plan_brief(flight_plan_table, incident)
 
             # 显示位置影响分析结果
             position_impact = output.get("position_impact_analysis", {})
             if position_impact:
-                print_info(f"位置特定影响分析:")
+                info.append(f"位置特定影响分析:")
                 direct = position_impact.get("direct_impact", {})
                 if direct.get("affected_facility"):
-                    print_info(f"  事发设施: {direct['affected_facility']}")
+                    info.append(f"  事发设施: {direct['affected_facility']}")
                 if direct.get("closure_time_minutes"):
-                    print_info(f"  预计封闭: {direct['closure_time_minutes']} 分钟")
+                    info.append(f"  预计封闭: {direct['closure_time_minutes']} 分钟")
                 if direct.get("severity_score"):
-                    print_info(f"  严重程度: {direct['severity_score']:.1f}/5.0")
+                    info.append(f"  严重程度: {direct['severity_score']:.1f}/5.0")
 
                 adjacent = position_impact.get("adjacent_impact", {})
                 if adjacent.get("total_adjacent", 0) > 0:
                     count_by_type = adjacent.get("count_by_type", {})
                     if count_by_type.get("机位", 0) > 0:
-                        print_info(f"  相邻机位影响: {count_by_type['机位']} 个")
+                        info.append(f"  相邻机位影响: {count_by_type['机位']} 个")
                     if count_by_type.get("滑行道", 0) > 0:
-                        print_info(f"  相邻滑行道影响: {count_by_type['滑行道']} 条")
+                        info.append(f"  相邻滑行道影响: {count_by_type['滑行道']} 条")
                     if count_by_type.get("跑道", 0) > 0:
-                        print_info(f"  相邻跑道影响: {count_by_type['跑道']} 条")
+                        info.append(f"  相邻跑道影响: {count_by_type['跑道']} 条")
 
                 efficiency = position_impact.get("efficiency_impact", {})
                 if efficiency.get("description"):
-                    print_info(f"  运行效率: {efficiency['description']}")
+                    info.append(f"  运行效率: {efficiency['description']}")
                 if efficiency.get("delay_per_flight"):
-                    print_info(f"  预计延误: {efficiency['delay_per_flight']} 分钟/架次")
+                    info.append(f"  预计延误: {efficiency['delay_per_flight']} 分钟/架次")
                 if efficiency.get("capacity_reduction_percent"):
-                    print_info(f"  容量降低: {efficiency['capacity_reduction_percent']}%")
+                    info.append(f"  容量降低: {efficiency['capacity_reduction_percent']}%")
+
+            print_info_lines(info)
 
         elif node_name == "reasoning":
             thought = output.get("current_thought", "")
@@ -950,25 +1189,27 @@ class AgentRunner:
             if observation:
                 print_observation(observation)
 
+            info = []
+
             if output.get("risk_assessment"):
                 risk = output["risk_assessment"]
                 level = risk.get("level", "")
                 score = risk.get("score", 0)
-                print_info(f"风险: {level} ({score}/100) - {risk.get('rationale', '')}")
+                info.append(f"风险: {level} ({score}/100) - {risk.get('rationale', '')}")
 
             if output.get("spatial_analysis"):
                 spatial = output["spatial_analysis"]
-                print_info(f"影响范围分析:")
+                info.append(f"影响范围分析:")
                 if spatial.get("anchor_node"):
-                    print_info(f"  起始节点: {spatial['anchor_node']} ({spatial.get('anchor_node_type', '')})")
+                    info.append(f"  起始节点: {spatial['anchor_node']} ({spatial.get('anchor_node_type', '')})")
                 if spatial.get("isolated_nodes"):
-                    print_info(f"  隔离区域: {len(spatial['isolated_nodes'])} 个节点")
+                    info.append(f"  隔离区域: {len(spatial['isolated_nodes'])} 个节点")
                 if spatial.get("affected_stands"):
-                    print_info(f"  受影响机位: {', '.join(spatial['affected_stands'][:5])}")
+                    info.append(f"  受影响机位: {', '.join(spatial['affected_stands'][:5])}")
                 if spatial.get("affected_taxiways"):
-                    print_info(f"  受影响滑行道: {', '.join(spatial['affected_taxiways'][:5])}")
+                    info.append(f"  受影响滑行道: {', '.join(spatial['affected_taxiways'][:5])}")
                 if spatial.get("affected_runways"):
-                    print_info(f"  受影响跑道: {', '.join(spatial['affected_runways'])}")
+                    info.append(f"  受影响跑道: {', '.join(spatial['affected_runways'])}")
 
             if output.get("flight_impact_prediction"):
                 flight_impact = output["flight_impact_prediction"]
@@ -976,7 +1217,9 @@ class AgentRunner:
                 if stats:
                     total = stats.get("total_affected_flights", 0)
                     avg_delay = stats.get("average_delay_minutes", 0)
-                    print_info(f"航班影响预测: {total} 架次, 平均延误 {avg_delay:.1f} 分钟")
+                    info.append(f"航班影响预测: {total} 架次, 平均延误 {avg_delay:.1f} 分钟")
+
+            print_info_lines(info)
             self._maybe_save_advice_report(output)
 
         elif node_name == "fsm_validator":
@@ -998,7 +1241,7 @@ class AgentRunner:
         action = output.get("current_action", "")
 
         # 支持 ask_for_detail 和 smart_ask 两种询问工具
-        if action in ["ask_for_detail", "smart_ask"]:
+        if action in _ASK_ACTIONS:
             if action == "smart_ask":
                 observation = output.get("current_observation", "")
                 # 未生成问题时不应继续追问
@@ -1010,13 +1253,7 @@ class AgentRunner:
             self.pending_question = None  # 初始化
 
             # 优先从state的messages中获取工具执行后的问题（已添加机号前缀）
-            messages = self.state.get("messages", [])
-            if messages:
-                # 获取最后一条assistant消息
-                for msg in reversed(messages):
-                    if msg.get("role") == "assistant":
-                        self.pending_question = msg.get("content", "")
-                        break
+            self.pending_question = self._get_latest_assistant_message()
 
             # 如果没有找到，使用原始输入作为fallback
             if not self.pending_question:
@@ -1058,88 +1295,87 @@ class AgentRunner:
 # 主程序
 # ============================================================
 
+# 报告输出根目录与场景子目录
+_REPORTS_ROOT = Path(PROJECT_ROOT) / "outputs" / "reports"
+_SCENARIO_REPORT_FOLDERS = {
+    "oil_spill": "oil_spill",
+    "bird_strike": "bird_strike",
+    "fod": "fod",
+}
+
+
 def print_final_report(report: Dict[str, Any], answer: str = ""):
-    """打印最终报告"""
-    print_header("处置报告")
+    """打印最终报告（先拼装所有行，再一次性写入 stdout）"""
+    parts: List[str] = [f"\n{_HEADER_RULE}", " 处置报告", f"{_HEADER_RULE}\n"]
+    out = parts.append
 
     if answer:
-        print(answer)
-        return
-
-    if not report:
-        print_warning("报告为空")
-        return
+        out(answer)
+    elif not report:
+        out(f"{_WARNING_PREFIX}报告为空")
+    else:
+        if report.get("title"):
+            out(f"{report['title']}\n")
+
+        if report.get("event_summary"):
+            out("【事件摘要】")
+            out(report["event_summary"])
+            out("")
+
+        if report.get("risk_level"):
+            out(f"【风险等级】{report['risk_level']}\n")
+
+        if report.get("handling_process"):
+            out("【处置过程】")
+            for step in report["handling_process"]:
+                out(f"  - {step}")
+            out("")
+
+        if report.get("checklist_items"):
+            out("【检查单】")
+            for category in report["checklist_items"]:
+                out(f"  {category.get('category', '')}:")
+                for item in category.get("items", []):
+                    status = "[v]" if item.get("status") == "completed" else "[x]"
+                    out(f"    {status} {item.get('item', '')}")
+            out("")
+
+        if report.get("coordination_units"):
+            out("【协调单位】")
+            for unit in report["coordination_units"]:
+                if isinstance(unit, dict):
+                    name = unit.get("name", "")
+                    notified = "已通知" if unit.get("notified") else "未通知"
+                    out(f"  - {name} ({notified})")
+                else:
+                    out(f"  - {unit}")
+            out("")
 
-    if report.get("title"):
-        print(f"{report['title']}\n")
-
-    if report.get("event_summary"):
-        print(f"【事件摘要】")
-        print(report["event_summary"])
-        print()
-
-    if report.get("risk_level"):
-        print(f"【风险等级】{report['risk_level']}\n")
-
-    if report.get("handling_process"):
-        print(f"【处置过程】")
-        for step in report["handling_process"]:
-            print(f"  - {step}")
-        print()
-
-    if report.get("checklist_items"):
-        print(f"【检查单】")
-        for category in report["checklist_items"]:
-            print(f"  {category.get('category', '')}:")
-            for item in category.get("items", []):
-                status = "[v]" if item.get("status") == "completed" else "[x]"
-                print(f"    {status} {item.get('item', '')}")
-        print()
-
-    if report.get("coordination_units"):
-        print(f"【协调单位】")
-        for unit in report["coordination_units"]:
-            if isinstance(unit, dict):
-                name = unit.get("name", "")
-                notified = "已通知" if unit.get("notified") else "未通知"
-                print(f"  - {name} ({notified})")
-            else:
-                print(f"  - {unit}")
-        print()
+        if report.get("recommendations"):
+            out("【处置建议】")
+            for i, rec in enumerate(report["recommendations"], 1):
+                out(f"  {i}. {rec}")
+            out("")
 
-    if report.get("recommendations"):
-        print(f"【处置建议】")
-        for i, rec in enumerate(report["recommendations"], 1):
-            print(f"  {i}. {rec}")
-        print()
+        if report.get("generated_at"):
+            out(f"{_DIM_PREFIX}报告生成时间: {report['generated_at']}")
 
-    if report.get("generated_at"):
-        print_dim(f"报告生成时间: {report['generated_at']}")
+    sys.stdout.write("\n".join(parts) + "\n")
 
 
 def save_report(state: Dict[str, Any], report: Dict[str, Any], answer: str = "") -> str:
     """保存报告到文件（Markdown格式）"""
-    import json
-
     # 获取场景类型，用于按场景分类存储
     scenario_type = state.get("scenario_type", "oil_spill")
 
-    # 根据场景类型创建对应的文件夹路径
-    scenario_folder_map = {
-        "oil_spill": "oil_spill",
-        "bird_strike": "bird_strike",
-        "fod": "fod"
-    }
-
-    # 获取场景文件夹名称，默认为 "other"
-    scenario_folder = scenario_folder_map.get(scenario_type, "other")
-
-    # 创建按场景分类的报告目录
-    reports_dir = os.path.join(PROJECT_ROOT, "outputs", "reports", scenario_folder)
-    os.makedirs(reports_dir, exist_ok=True)
+    # 创建按场景分类的报告目录（未知场景归入 "other"）
+    reports_dir = _REPORTS_ROOT / _SCENARIO_REPORT_FOLDERS.get(scenario_type, "other")
+    reports_dir.mkdir(parents=True, exist_ok=True)
 
     session_id = state.get("session_id", "unknown")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    generated_at = now.isoformat()
 
     # 获取航班号用于文件名
     incident = state.get("incident", {})
@@ -1147,93 +1383,104 @@ def save_report(state: Dict[str, Any], report: Dict[str, Any], answer: str = "")
 
     # 生成文件名
     if flight_no:
-        md_filename = os.path.join(reports_dir, f"检查单_{flight_no}_{timestamp}.md")
+        md_path = reports_dir / f"检查单_{flight_no}_{timestamp}.md"
     else:
-        md_filename = os.path.join(reports_dir, f"检查单_{session_id}_{timestamp}.md")
+        md_path = reports_dir / f"检查单_{session_id}_{timestamp}.md"
 
-    # 保存 Markdown 报告
-    with open(md_filename, "w", encoding="utf-8") as f:
-        if answer:
-            # LLM 生成的 Markdown 报告
-            f.write(answer)
-        else:
-            # 回退格式
-            f.write("# 机坪特情处置检查单\n\n")
-            f.write(f"**会话ID**: {session_id}\n")
-            f.write(f"**生成时间**: {datetime.now().isoformat()}\n\n")
-
-            if report.get("event_summary"):
-                f.write("## 事件摘要\n")
-                f.write(report["event_summary"] + "\n\n")
-
-            if report.get("risk_level"):
-                f.write(f"## 风险等级: {report['risk_level']}\n\n")
-
-            execution_summary = report.get("execution_summary", {})
-            if execution_summary:
-                f.write("## 执行轨迹摘要\n")
-                f.write(f"- 会话ID: {execution_summary.get('session_id', session_id)}\n")
-                f.write(f"- FSM 状态: {execution_summary.get('fsm_state', '')}\n")
-                f.write(f"- 工具执行次数: {execution_summary.get('actions_total', 0)}\n")
-                recent_actions = execution_summary.get("recent_actions", [])
-                if recent_actions:
-                    f.write(f"- 最近动作: {', '.join(recent_actions)}\n")
-                f.write("\n")
-
-            if report.get("handling_process"):
-                f.write("## 处置过程\n")
-                for step in report["handling_process"]:
-                    f.write(f"- {step}\n")
-                f.write("\n")
-
-            coordination_units = report.get("coordination_units") or []
-            if coordination_units:
-                f.write("## 协同单位通知记录\n")
-                f.write("| 单位 | 是否通知 | 通知时间 |\n")
-                f.write("|---|---|---|\n")
-                for unit in coordination_units:
-                    if isinstance(unit, dict):
-                        name = unit.get("name", "")
-                        notified = "已通知" if unit.get("notified") else "未通知"
-                        notify_time = unit.get("notify_time") or "——"
-                        f.write(f"| {name} | {notified} | {notify_time} |\n")
-                    else:
-                        f.write(f"| {unit} | 未知 | —— |\n")
-                f.write("\n")
-
-            if report.get("recommendations"):
-                f.write("## 处置建议\n")
-                for i, rec in enumerate(report["recommendations"], 1):
-                    f.write(f"1. {rec}\n")
-                f.write("\n")
-
-    # 保存 JSON 格式（供程序使用）
-    json_filename = os.path.join(reports_dir, f"data_{timestamp}.json")
-    with open(json_filename, "w", encoding="utf-8") as f:
-        json.dump({
-            "session_id": session_id,
-            "generated_at": datetime.now().isoformat(),
-            "incident": incident,
-            "risk_assessment": state.get("risk_assessment", {}),
-            "spatial_analysis": state.get("spatial_analysis", {}),
-            "checklist": state.get("checklist", {}),
-            "fsm_state": state.get("fsm_state", ""),
-            "actions_taken": state.get("actions_taken", []),
-            "notifications_sent": state.get("notifications_sent", []),
-        }, f, ensure_ascii=False, indent=2)
+    # 保存 Markdown 报告（先在内存中拼装，再一次性写入）
+    if answer:
+        # LLM 生成的 Markdown 报告
+        md_content = answer
+    else:
+        # 回退格式
+        parts: List[str] = [
+            "# 机坪特情处置检查单\n\n",
+            f"**会话ID**: {session_id}\n",
+            f"**生成时间**: {generated_at}\n\n",
+        ]
+
+        if report.get("event_summary"):
+            parts.extend(("## 事件摘要\n", report["event_summary"], "\n\n"))
+
+        if report.get("risk_level"):
+            parts.append(f"## 风险等级: {report['risk_level']}\n\n")
+
+        execution_summary = report.get("execution_summary", {})
+        if execution_summary:
+            parts.extend((
+                "## 执行轨迹摘要\n",
+                f"- 会话ID: {execution_summary.get('session_id', session_id)}\n",
+                f"- FSM 状态: {execution_summary.get('fsm_state', '')}\n",
+                f"- 工具执行次数: {execution_summary.get('actions_total', 0)}\n",
+            ))
+            recent_actions = execution_summary.get("recent_actions", [])
+            if recent_actions:
+                parts.append(f"- 最近动作: {', '.join(recent_actions)}\n")
+            parts.append("\n")
+
+        if report.get("handling_process"):
+            parts.append("## 处置过程\n")
+            parts.extend(f"- {step}\n" for step in report["handling_process"])
+            parts.append("\n")
+
+        coordination_units = report.get("coordination_units") or []
+        if coordination_units:
+            parts.extend(("## 协同单位通知记录\n", "| 单位 | 是否通知 | 通知时间 |\n", "|---|---|---|\n"))
+            for unit in coordination_units:
+                if isinstance(unit, dict):
+                    name = unit.get("name", "")
+                    notified = "已通知" if unit.get("notified") else "未通知"
+                    notify_time = unit.get("notify_time") or "——"
+                    parts.append(f"| {name} | {notified} | {notify_time} |\n")
+                else:
+                    parts.append(f"| {unit} | 未知 | —— |\n")
+            parts.append("\n")
+
+        if report.get("recommendations"):
+            parts.append("## 处置建议\n")
+            parts.extend(f"1. {rec}\n" for rec in report["recommendations"])
+            parts.append("\n")
+
+        md_content = "".join(parts)
+
+    md_path.write_text(md_content, encoding="utf-8")
+
+    # LLM 已给出完整报告时，JSON 数据文件仅在调试或显式开启时保存
+    if answer and not (settings.DEBUG or settings.SAVE_JSON_SIDECAR):
+        return str(md_path)
+
+    # 保存 JSON 格式（供程序使用，紧凑输出；调试模式额外保存缩进版本便于查看）
+    payload = {
+        "session_id": session_id,
+        "generated_at": generated_at,
+        "incident": incident,
+        "risk_assessment": state.get("risk_assessment", {}),
+        "spatial_analysis": state.get("spatial_analysis", {}),
+        "checklist": state.get("checklist", {}),
+        "fsm_state": state.get("fsm_state", ""),
+        "actions_taken": state.get("actions_taken", []),
+        "notifications_sent": state.get("notifications_sent", []),
+    }
+    (reports_dir / f"data_{timestamp}.json").write_bytes(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS, default=str)
+    )
+    if settings.DEBUG:
+        (reports_dir / f"data_pretty_{timestamp}.json").write_bytes(
+            orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str)
+        )
 
-    return md_filename
+    return str(md_path)
 
 
 def save_advice_report(state: Dict[str, Any], observation: str) -> str:
     """保存漏油综合评估报告到 outputs/advice"""
-    import json
-
     reports_dir = os.path.join(PROJECT_ROOT, "outputs", "advice")
     os.makedirs(reports_dir, exist_ok=True)
 
     session_id = state.get("session_id", "unknown")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    generated_at = now.isoformat()
     incident = state.get("incident", {})
     flight_no = incident.get("flight_no") or incident.get("flight_no_display", "")
 
@@ -1252,7 +1499,7 @@ def save_advice_report(state: Dict[str, Any], observation: str) -> str:
     lines = [
         "# 漏油场景综合评估报告",
         "",
-        f"- 生成时间: {datetime.now().isoformat()}",
+        f"- 生成时间: {generated_at}",
     ]
     if flight_no:
         lines.append(f"- 航班号: {flight_no}")
@@ -1293,7 +1540,7 @@ def save_advice_report(state: Dict[str, Any], observation: str) -> str:
     with open(json_filename, "w", encoding="utf-8") as f:
         json.dump({
             "session_id": session_id,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": generated_at,
             "incident": incident,
             "observation": observation,
             "operational_impact_narrative": impact_narrative,
@@ -1310,6 +1557,11 @@ def save_advice_report(state: Dict[str, Any], observation: str) -> str:
     return md_filename
 
 
+# 主循环命令词
+_EXIT_COMMANDS = frozenset({"exit", "quit", "q"})
+_CONTINUE_COMMANDS = frozenset({"y", "yes", "是"})
+
+
 def main():
     """主函数"""
     # 初始化日志配置
@@ -1335,7 +1587,7 @@ def main():
 
     # 获取初始输入
     user_input = get_user_input()
-    if not user_input or user_input.lower() in ["exit", "quit", "q"]:
+    if not user_input or user_input.lower() in _EXIT_COMMANDS:
         print_info("退出系统")
         return 0
     user_input = apply_readout_for_processing(user_input, is_first_contact=True)
@@ -1381,39 +1633,30 @@ def main():
 
             cmd = user_input.lower().strip()
 
-            # 检查是否是确认结束（包含各种表达方式）
-            is_confirm_end = False
-
-            # 简单确认词
-            if cmd in ["y", "yes", "是", "确认", "没有", "无", "结束", "ok", "好的", "可以", "完毕"]:
-                is_confirm_end = True
-            # 否定+补充的组合（表示没有要补充的）
-            elif any(neg in cmd for neg in ["没", "无", "不", "没有"]) and \
-                 any(word in cmd for word in ["补充", "其他", "问题", "情况", "要说", "要补", "要报"]):
-                is_confirm_end = True
-            elif any(phrase in cmd for phrase in ["无信息补充", "无需补充", "没信息补充", "没有补充", "无补充"]):
-                is_confirm_end = True
+            # 检查是否是确认结束（简单确认词，或否定+补充的组合）
+            confirm_end = is_confirm_end(cmd)
+
             # 纯数字或字母（可能是误输入，但不应该被当作补充信息）
-            elif len(cmd) <= 2 and not any(c.isalpha() and ord(c) > 127 for c in cmd):
+            if not confirm_end and len(cmd) <= 2 and not any(c.isalpha() and ord(c) > 127 for c in cmd):
                 # 如果输入很短且不包含中文，可能是误输入，询问用户
                 print_warning("输入过短，如需结束请输入 'y' 或 'yes'")
                 continue
 
-            if is_confirm_end:
+            if confirm_end:
                 # 用户确认结束，使用已生成的终版报告；如缺失则补生成
                 if (
                     not runner.state.get("final_report")
                     or not runner.state.get("final_answer")
                     or runner._is_waiting_answer()
                 ):
-                    from agent.nodes.output_generator import output_generator_node
                     updates = output_generator_node(runner.state)
                     runner.state.update(updates)
-                from agent.state import FSMState
-                runner.state["fsm_state"] = FSMState.COMPLETED.value
-                runner.state["report_generated"] = False
-                runner.state["awaiting_user"] = False
-                runner.state["is_complete"] = True
+                runner.state.update({
+                    "fsm_state": FSMState.COMPLETED.value,
+                    "report_generated": False,
+                    "awaiting_user": False,
+                    "is_complete": True,
+                })
                 # 继续循环，会在下次迭代时进入 completed 分支
                 continue
             else:
@@ -1434,16 +1677,19 @@ def main():
                     # 如果问题包含多个"是否"，可能用户困惑，尝试澄清
                     print_info("检测到问题可能表述不清，自动澄清...")
                     # 强制清除状态，让系统重新推理
-                    runner.state["awaiting_user"] = False
-                    runner.state["_duplicate_question_count"] = 0
-                    runner.state["_last_asked_question"] = ""
-                    runner.state["next_node"] = "reasoning"
+                    runner.state.update({
+                        "awaiting_user": False,
+                        "_duplicate_question_count": 0,
+                        "_last_asked_question": "",
+                        "_last_asked_question_hash": None,
+                        "next_node": "reasoning",
+                    })
                     continue
                 continue
             user_input = apply_readout_for_processing(user_input, is_first_contact=False)
 
             cmd = user_input.lower()
-            if cmd in ["exit", "quit", "q"]:
+            if cmd in _EXIT_COMMANDS:
                 print_info("用户退出")
                 break
             elif cmd == "status":
@@ -1456,7 +1702,7 @@ def main():
             print_warning(f"执行错误: {result.get('message', '未知错误')}")
 
             user_input = get_user_input("是否继续? (y/n)")
-            if user_input.lower() not in ["y", "yes", "是"]:
+            if user_input.lower() not in _CONTINUE_COMMANDS:
                 break
 
         else:
@@ -7,6 +7,7 @@ IATA (2字母) -> ICAO (3字母) 代码映射
 
 # 标准库
 import re
+from functools import lru_cache
 
 # IATA到ICAO代码映射
 IATA_TO_ICAO = {
@@ -121,6 +122,22 @@ AIRLINE_FULL_NAMES = {
 }
 
 
+# 已知 ICAO 航空公司代码（航班号校验用）
+_VALID_ICAO_PREFIXES = frozenset(ICAO_TO_IATA) | frozenset(AIRLINE_FULL_NAMES)
+
+# 中文航空公司简称前缀（按长度降序组成单个锚定正则，保证最长匹配）
+_CHINESE_AIRLINE_PREFIX_RE = re.compile(
+    "^(" + "|".join(map(re.escape, sorted(AIRLINE_CHINESE_TO_IATA, key=len, reverse=True))) + ")"
+)
+
+# 航班号解析正则（模块加载时预编译）
+_IATA_FLIGHT_RE = re.compile(r"^([A-Z0-9]{2})(\d{3,4})$")
+_ICAO_FLIGHT_RE = re.compile(r"^([A-Z]{3})(\d{3,4})$")
+_IATA_CALLSIGN_RE = re.compile(r"^([A-Z0-9]{2})(\d+)$")
+_ICAO_CALLSIGN_RE = re.compile(r"^([A-Z0-9]{3})(\d+)$")
+
+
+@lru_cache(maxsize=1024)
 def normalize_flight_number(flight_input: str) -> str:
     """
     将各种格式的航班号转换为ICAO格式
@@ -141,18 +158,19 @@ def normalize_flight_number(flight_input: str) -> str:
 
     flight_input = flight_input.strip().upper()
 
-    # 1. 提取中文航空公司名称和数字部分（如"南航1234"）
-    for chinese_name, iata_code in AIRLINE_CHINESE_TO_IATA.items():
-        if flight_input.startswith(chinese_name):
-            # 提取数字部分
-            number_part = flight_input[len(chinese_name):].strip()
-            if number_part.isdigit():
-                icao_code = IATA_TO_ICAO.get(iata_code, iata_code)
-                return f"{icao_code}{number_part}"
+    # 1. 提取中文航空公司名称和数字部分（如"南航1234"；纯 ASCII 输入直接跳过）
+    match_cn = None if flight_input.isascii() else _CHINESE_AIRLINE_PREFIX_RE.match(flight_input)
+    if match_cn:
+        # 提取数字部分
+        number_part = flight_input[match_cn.end():].strip()
+        if number_part.isdigit():
+            iata_code = AIRLINE_CHINESE_TO_IATA[match_cn.group(1)]
+            icao_code = IATA_TO_ICAO.get(iata_code, iata_code)
+            return f"{icao_code}{number_part}"
 
     # 2. 优先尝试2字母IATA代码（如 3U3349 -> CSC3349）
     if len(flight_input) >= 3:
-        match_2char = re.match(r"^([A-Z0-9]{2})(\d{3,4})$", flight_input)
+        match_2char = _IATA_FLIGHT_RE.match(flight_input)
         if match_2char:
             prefix, number_part = match_2char.group(1), match_2char.group(2)
             if prefix in IATA_TO_ICAO:
@@ -161,11 +179,11 @@ def normalize_flight_number(flight_input: str) -> str:
 
     # 3. 尝试3字母ICAO代码（如 CSC3349）
     if len(flight_input) >= 4:
-        match_3char = re.match(r"^([A-Z]{3})(\d{3,4})$", flight_input)
+        match_3char = _ICAO_FLIGHT_RE.match(flight_input)
         if match_3char:
             prefix, number_part = match_3char.group(1), match_3char.group(2)
             # 已经是ICAO代码，直接返回
-            if prefix in ICAO_TO_IATA or prefix in AIRLINE_FULL_NAMES:
+            if prefix in _VALID_ICAO_PREFIXES:
                 return flight_input
 
     # 3. 无法识别，返回原输入的大写形式
@@ -187,6 +205,7 @@ def get_airline_name(icao_code: str) -> str:
     return AIRLINE_FULL_NAMES.get(airline_code, airline_code)
 
 
+@lru_cache(maxsize=1024)
 def format_callsign_display(flight_no: str) -> str:
     """
     将航班号格式化为中文简称呼号（用于对话显示）
@@ -201,14 +220,14 @@ def format_callsign_display(flight_no: str) -> str:
         return ""
 
     raw = flight_no.strip()
-    # 已包含中文时，直接返回原始格式
-    if any('\u4e00' <= ch <= '\u9fff' for ch in raw):
+    # 已包含中文时，直接返回原始格式（纯 ASCII 输入无需逐字符检查）
+    if not raw.isascii() and any('\u4e00' <= ch <= '\u9fff' for ch in raw):
         return raw
 
     upper = raw.upper()
-    match = re.match(r"^([A-Z0-9]{2})(\d+)$", upper)
+    match = _IATA_CALLSIGN_RE.match(upper)
     if not match:
-        match = re.match(r"^([A-Z0-9]{3})(\d+)$", upper)
+        match = _ICAO_CALLSIGN_RE.match(upper)
     if not match:
         return raw
 
@@ -2,6 +2,7 @@
 全局配置模块
 """
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -23,6 +24,10 @@ class Settings(BaseSettings):
     # 环境
     ENV: str = Field(default="development", description="运行环境")
     DEBUG: bool = Field(default=True, description="调试模式")
+    SAVE_JSON_SIDECAR: bool = Field(
+        default=False,
+        description="LLM 已生成完整报告时是否仍保存 JSON 数据文件（调试模式下始终保存）",
+    )
     
     # LLM 配置
     LLM_PROVIDER: str = Field(default="openai", description="LLM 提供商: zhipu, openai")
@@ -74,6 +79,7 @@ class Settings(BaseSettings):
     # API 配置
     API_HOST: str = Field(default="0.0.0.0", description="API 主机")
     API_PORT: int = Field(default=8000, description="API 端口")
+    API_WORKERS: int = Field(default=0, description="API worker 进程数，0 表示自动（内存会话存储时为 1，否则按 CPU 核数计算）")
     CORS_ALLOW_ORIGINS: List[str] = Field(default=["*"], description="CORS 允许来源")
 
     # API 认证配置
@@ -115,8 +121,23 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """获取全局配置（只解析一次 .env 与环境变量）"""
+    return Settings()
+
+
+def reload_settings() -> Settings:
+    """重新读取 .env 与环境变量，并原地刷新全局配置实例（已导入的引用同步生效）"""
+    fresh = Settings()
+    for name in Settings.model_fields:
+        setattr(settings, name, getattr(fresh, name))
+    return settings
+
+
 # 全局配置实例
-settings = Settings()
+settings = get_settings()
 
 
 # 场景配置路径
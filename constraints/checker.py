@@ -6,12 +6,14 @@
 2. 强制动作执行状态
 3. FSM 状态转换前置条件
 """
-from typing import Dict, List, Any, Optional, Tuple
+import random
+import threading
+from typing import Dict, List, Any, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
 from agent.state import AgentState, FSMState
-from constraints.loader import ConstraintLoader, ScenarioConstraints, get_loader
+from constraints.loader import CheckKind, ConstraintLoader, ScenarioConstraints, get_loader
 
 
 class ConstraintSeverity(Enum):
@@ -21,9 +23,9 @@ class ConstraintSeverity(Enum):
     INFO = "info"        # 信息提示
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ConstraintViolation:
-    """约束违反详情"""
+    """约束违反详情（不可变）"""
     severity: ConstraintSeverity
     code: str
     message: str
@@ -39,6 +41,11 @@ class ConstraintCheckResult:
     passed: bool
     violations: List[ConstraintViolation] = field(default_factory=list)
     warnings: List[ConstraintViolation] = field(default_factory=list)
+    # ERROR 级违规计数，add_violation 时增量维护，避免每次重新扫描
+    _error_count: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._error_count = sum(1 for v in self.violations if v.severity == ConstraintSeverity.ERROR)
 
     @property
     def errors(self) -> List[ConstraintViolation]:
@@ -47,9 +54,10 @@ class ConstraintCheckResult:
     def add_violation(self, violation: ConstraintViolation):
         if violation.severity == ConstraintSeverity.ERROR:
             self.violations.append(violation)
+            self._error_count += 1
         else:
             self.warnings.append(violation)
-        self.passed = len(self.errors) == 0
+        self.passed = self._error_count == 0
 
 
 class ConstraintChecker:
@@ -65,14 +73,21 @@ class ConstraintChecker:
     WARN_FIELD_MISSING = "FIELD_MISSING"
     WARN_ACTION_RECOMMENDED = "ACTION_RECOMMENDED"
 
-    def __init__(self, loader: Optional[ConstraintLoader] = None):
+    def __init__(
+        self,
+        loader: Optional[ConstraintLoader] = None,
+        sampling_rate: float = 1.0,
+    ):
         """
         初始化约束检查器
 
         Args:
             loader: 约束加载器实例
+            sampling_rate: check_all 的采样率（1.0 = 每次检查；
+                低于 1.0 时未命中采样的调用直接返回通过）
         """
         self.loader = loader or get_loader()
+        self.sampling_rate = sampling_rate
 
     def check_all(
         self,
@@ -89,13 +104,28 @@ class ConstraintChecker:
         Returns:
             ConstraintCheckResult 检查结果
         """
-        result = ConstraintCheckResult(passed=True)
+        if self.sampling_rate < 1.0 and random.random() >= self.sampling_rate:
+            return ConstraintCheckResult(passed=True)
+        return self._run_checks(state, strict_mode)
+
+    def _run_checks(
+        self,
+        state: AgentState,
+        strict_mode: bool = False
+    ) -> ConstraintCheckResult:
+        """执行全部约束检查（不受采样率影响）"""
         scenario_type = state.get('scenario_type', 'oil_spill')
 
         try:
             constraints = self.loader.load(scenario_type)
+            # 配置文件按需解析，在此触发以便解析失败同样归入加载失败
+            constraints.p1_keys
+            constraints.state_constraints
+            if strict_mode:
+                constraints.p2_keys
         except Exception as e:
             # 如果加载失败，返回错误
+            result = ConstraintCheckResult(passed=True)
             result.add_violation(ConstraintViolation(
                 severity=ConstraintSeverity.ERROR,
                 code="CONSTRAINT_LOAD_FAILED",
@@ -104,177 +134,125 @@ class ConstraintChecker:
             ))
             return result
 
-        # 1. 检查 P1 字段完整性
-        self._check_p1_fields(state, constraints, result)
-
-        # 2. 检查状态必需的字段
         fsm_state = state.get('fsm_state', FSMState.INIT.value)
-        self._check_state_required_fields(state, constraints, fsm_state, result)
-
-        # 3. 检查强制动作
-        self._check_mandatory_actions(state, constraints, fsm_state, result)
-
-        # 4. 检查 P2 字段（严格模式下）
-        if strict_mode:
-            self._check_p2_fields(state, constraints, result)
-
-        return result
-
-    def check_p1_complete(self, state: AgentState) -> Tuple[bool, Optional[str]]:
-        """
-        快速检查 P1 字段是否收集完整
-
-        Args:
-            state: Agent 状态
-
-        Returns:
-            (是否完整, 未完成的字段名或 None)
-        """
-        scenario_type = state.get('scenario_type', 'oil_spill')
-        checklist = state.get('checklist', {})
-
-        try:
-            constraints = self.loader.load(scenario_type)
-            p1_keys = [f.key for f in constraints.p1_fields]
-
-            for key in p1_keys:
-                if not checklist.get(key, False):
-                    return False, key
-
-            return True, None
-        except Exception:
-            # 如果加载失败，使用硬编码的默认 P1 字段
-            default_p1 = ['fluid_type', 'continuous', 'engine_status', 'position']
-            for key in default_p1:
-                if not checklist.get(key, False):
-                    return False, key
-            return True, None
-
-    def _check_p1_fields(
-        self,
-        state: AgentState,
-        constraints: ScenarioConstraints,
-        result: ConstraintCheckResult
-    ):
-        """检查 P1 字段是否全部收集"""
-        checklist = state.get('checklist', {})
-        p1_keys = [f.key for f in constraints.p1_fields]
-
-        missing_fields = []
-        for key in p1_keys:
-            if not checklist.get(key, False):
-                missing_fields.append(key)
-
-        if missing_fields:
-            # 查找字段标签
-            field_labels = {f.key: f.label for f in constraints.p1_fields}
-            missing_labels = [field_labels.get(f, f) for f in missing_fields]
+        return self._compute_checks(state, constraints, fsm_state, strict_mode)
 
-            result.add_violation(ConstraintViolation(
-                severity=ConstraintSeverity.ERROR,
-                code=self.ERR_P1_INCOMPLETE,
-                message=f"P1 字段未完全收集，缺少: {', '.join(missing_labels)}",
-                field=", ".join(missing_fields),
-                suggestion="需要收集完整的关键事实才能进行风险评估"
-            ))
-
-    def _check_state_required_fields(
+    def _compute_checks(
         self,
         state: AgentState,
         constraints: ScenarioConstraints,
         fsm_state: str,
-        result: ConstraintCheckResult
-    ):
-        """检查当前状态必需的字段"""
-        state_constraint = constraints.state_constraints.get(fsm_state)
-        if not state_constraint:
-            return
+        strict_mode: bool,
+    ) -> ConstraintCheckResult:
+        """
+        按检查计划单次遍历执行全部约束检查
 
-        required_fields = state_constraint.required_checklist_fields
-        if not required_fields:
-            return
+        违规按原有顺序输出：P1 字段、状态必需字段、强制动作、P2 字段（严格模式下）
+        """
+        result = ConstraintCheckResult(passed=True)
+        plan = constraints.check_plan(fsm_state, strict_mode)
+        if not plan:
+            # 场景未配置任何字段与动作（如尚在编写中），无需检查
+            return result
 
         checklist = state.get('checklist', {})
+        actions_done = state.get('mandatory_actions_done', {})
         incident = state.get('incident', {})
 
-        for field_name in required_fields:
-            # 检查是否已收集
-            if not checklist.get(field_name, False):
-                result.add_violation(ConstraintViolation(
+        # 状态必需字段中事件值为空的字段（集合求交，避免逐字段双重查找）
+        state_constraint = constraints.state_constraints.get(fsm_state)
+        null_fields: Set[str] = set()
+        if state_constraint and incident:
+            null_fields = {
+                key for key in state_constraint.required_checklist_fields_set & incident.keys()
+                if incident[key] is None
+            }
+
+        missing_p1: List[Tuple[str, str]] = []
+        missing_p2: List[Tuple[str, str]] = []
+        state_violations: List[ConstraintViolation] = []
+
+        for key, kind, label in plan:
+            if kind is CheckKind.MANDATORY_ACTION:
+                # 尚未执行任何动作时（新会话常见）无需逐个查询
+                if not actions_done or not actions_done.get(key, False):
+                    state_violations.append(ConstraintViolation(
+                        severity=ConstraintSeverity.ERROR,
+                        code=self.ERR_MANDATORY_ACTION_NOT_DONE,
+                        message=f"状态 '{fsm_state}' 必须执行动作: {key}",
+                        field=key,
+                        suggestion=f"请执行 {key} 动作"
+                    ))
+            elif checklist.get(key, False):
+                # 检查字段值是否有效
+                if kind is CheckKind.STATE_FIELD and key in null_fields:
+                    state_violations.append(ConstraintViolation(
+                        severity=ConstraintSeverity.WARNING,
+                        code=self.WARN_FIELD_MISSING,
+                        message=f"字段 '{key}' 已标记收集但值为空",
+                        field=key
+                    ))
+            elif kind is CheckKind.P1_FIELD:
+                missing_p1.append((key, label))
+            elif kind is CheckKind.STATE_FIELD:
+                state_violations.append(ConstraintViolation(
                     severity=ConstraintSeverity.ERROR,
                     code=self.ERR_MISSING_REQUIRED_FIELD,
-                    message=f"状态 '{fsm_state}' 缺少必需字段: {field_name}",
-                    field=field_name,
-                    suggestion=f"请收集 {field_name} 字段信息"
-                ))
-            # 检查字段值是否有效
-            elif field_name in incident and incident[field_name] is None:
-                result.add_violation(ConstraintViolation(
-                    severity=ConstraintSeverity.WARNING,
-                    code=self.WARN_FIELD_MISSING,
-                    message=f"字段 '{field_name}' 已标记收集但值为空",
-                    field=field_name
+                    message=f"状态 '{fsm_state}' 缺少必需字段: {key}",
+                    field=key,
+                    suggestion=f"请收集 {key} 字段信息"
                 ))
+            else:
+                missing_p2.append((key, label))
 
-    def _check_mandatory_actions(
-        self,
-        state: AgentState,
-        constraints: ScenarioConstraints,
-        fsm_state: str,
-        result: ConstraintCheckResult
-    ):
-        """检查强制动作是否执行"""
-        state_constraint = constraints.state_constraints.get(fsm_state)
-        if not state_constraint:
-            return
+        # 1. P1 字段完整性
+        if missing_p1:
+            result.add_violation(ConstraintViolation(
+                severity=ConstraintSeverity.ERROR,
+                code=self.ERR_P1_INCOMPLETE,
+                message=f"P1 字段未完全收集，缺少: {', '.join(label for _, label in missing_p1)}",
+                field=", ".join(key for key, _ in missing_p1),
+                suggestion="需要收集完整的关键事实才能进行风险评估"
+            ))
 
-        required_actions = state_constraint.required_mandatory_actions
-        if not required_actions:
-            return
+        # 2-3. 状态必需字段与强制动作
+        for violation in state_violations:
+            result.add_violation(violation)
 
-        actions_done = state.get('mandatory_actions_done', {})
+        # 4. P2 字段（严格模式下）
+        if missing_p2:
+            result.add_violation(ConstraintViolation(
+                severity=ConstraintSeverity.WARNING,
+                code=self.WARN_FIELD_MISSING,
+                message=f"P2 字段未收集: {', '.join(label for _, label in missing_p2)}",
+                field=", ".join(key for key, _ in missing_p2),
+                suggestion="收集 P2 字段有助于更准确的风险评估"
+            ))
 
-        for action in required_actions:
-            # 支持两种格式：字符串 "action_name" 或 {"action": "action_name", ...}
-            action_key = action if isinstance(action, str) else action.get('action', '')
-            if not action_key:
-                continue
+        return result
 
-            if not actions_done.get(action_key, False):
-                result.add_violation(ConstraintViolation(
-                    severity=ConstraintSeverity.ERROR,
-                    code=self.ERR_MANDATORY_ACTION_NOT_DONE,
-                    message=f"状态 '{fsm_state}' 必须执行动作: {action_key}",
-                    field=action_key,
-                    suggestion=f"请执行 {action_key} 动作"
-                ))
+    def check_p1_complete(self, state: AgentState) -> Tuple[bool, Optional[str]]:
+        """
+        快速检查 P1 字段是否收集完整
 
-    def _check_p2_fields(
-        self,
-        state: AgentState,
-        constraints: ScenarioConstraints,
-        result: ConstraintCheckResult
-    ):
-        """检查 P2 字段（严格模式）"""
-        checklist = state.get('checklist', {})
-        p2_keys = [f.key for f in constraints.p2_fields]
+        Args:
+            state: Agent 状态
 
-        missing_fields = []
-        for key in p2_keys:
-            if not checklist.get(key, False):
-                missing_fields.append(key)
+        Returns:
+            (是否完整, 未完成的字段名或 None)
+        """
+        scenario_type = state.get('scenario_type', 'oil_spill')
+        checklist = state.get('checklist', {})
 
-        if missing_fields:
-            field_labels = {f.key: f.label for f in constraints.p2_fields}
-            missing_labels = [field_labels.get(f, f) for f in missing_fields]
+        try:
+            p1_keys = self.loader.load(scenario_type).p1_keys
+        except Exception:
+            # 如果加载失败，使用硬编码的默认 P1 字段
+            p1_keys = ('fluid_type', 'continuous', 'engine_status', 'position')
 
-            result.add_violation(ConstraintViolation(
-                severity=ConstraintSeverity.WARNING,
-                code=self.WARN_FIELD_MISSING,
-                message=f"P2 字段未收集: {', '.join(missing_labels)}",
-                field=", ".join(missing_fields),
-                suggestion="收集 P2 字段有助于更准确的风险评估"
-            ))
+        # 按配置顺序找到第一个缺失字段即停止
+        missing = next((key for key in p1_keys if not checklist.get(key, False)), None)
+        return missing is None, missing
 
     def can_proceed_to_next_phase(
         self,
@@ -291,7 +269,8 @@ class ConstraintChecker:
         Returns:
             (是否允许, 拒绝原因列表)
         """
-        result = self.check_all(state)
+        # 阶段转换门控始终完整检查，不参与采样
+        result = self._run_checks(state)
         reasons = [v.message for v in result.errors]
 
         # 特殊检查：进入 P1_RISK_ASSESS 需要至少部分 P1 字段
@@ -327,13 +306,11 @@ class ChecklistValidator:
         """
         try:
             constraints = self.loader.load(self.scenario_type)
+            # 查找字段定义（首次访问时解析 checklist.yaml）
+            field_def = constraints.field_by_key.get(field_name)
         except Exception:
             return True, None  # 加载失败时跳过验证
 
-        # 查找字段定义
-        all_fields = constraints.p1_fields + constraints.p2_fields
-        field_def = next((f for f in all_fields if f.key == field_name), None)
-
         if not field_def:
             return True, None  # 未知字段跳过
 
@@ -343,31 +320,35 @@ class ChecklistValidator:
 
         # 验证枚举值
         if field_def.options and value is not None:
-            valid_values = [opt['value'] for opt in field_def.options]
-            if value not in valid_values:
-                return False, f"字段 {field_name} 的值必须是以下之一: {', '.join(valid_values)}"
-
-        # 验证正则
-        if field_def.validation and value is not None:
             try:
-                import re
-                if not re.match(field_def.validation, str(value)):
-                    return False, f"字段 {field_name} 的值格式不正确"
-            except re.error:
-                pass  # 无效正则时跳过
+                is_valid_option = value in field_def.option_values
+            except TypeError:
+                # 不可哈希的值退回按顺序比较
+                is_valid_option = value in field_def.option_value_list
+            if not is_valid_option:
+                return False, f"字段 {field_name} 的值必须是以下之一: {', '.join(field_def.option_value_list)}"
+
+        # 验证正则（加载时已预编译，无效正则为 None 时跳过）
+        if field_def.validation_re is not None and value is not None:
+            if not field_def.validation_re.match(str(value)):
+                return False, f"字段 {field_name} 的值格式不正确"
 
         return True, None
 
 
 # 全局检查器实例
 _default_checker: Optional[ConstraintChecker] = None
+_default_checker_lock = threading.Lock()
 
 
 def get_checker() -> ConstraintChecker:
     """获取全局约束检查器实例"""
     global _default_checker
     if _default_checker is None:
-        _default_checker = ConstraintChecker()
+        # 双重检查：并发首次调用时只创建一个实例，保证共享同一份缓存
+        with _default_checker_lock:
+            if _default_checker is None:
+                _default_checker = ConstraintChecker()
     return _default_checker
 
 
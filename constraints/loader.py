@@ -6,28 +6,122 @@
 2. 强制动作约束（必须执行的动作）
 3. 状态转换约束（状态间的依赖关系）
 """
+import hashlib
+import marshal
 import os
+import re
+import tempfile
+import threading
+from functools import cached_property
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Any, Mapping, Optional, Pattern, Sequence, Tuple, Union, cast
 from dataclasses import dataclass, field as dataclass_field
+from enum import Enum
 import yaml  # type: ignore[import-untyped]
 
-
-@dataclass
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader  # libyaml C 实现
+except ImportError:  # pragma: no cover - 未编译 libyaml 时回退纯 Python 实现
+    from yaml import SafeLoader as _YamlSafeLoader
+
+
+# 解析结果缓存目录（位于源码树之外，可通过 AERO_YAML_CACHE_DIR 覆盖）
+_YAML_CACHE_DIR = Path(
+    os.environ.get("AERO_YAML_CACHE_DIR")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "aero_agent" / "yaml"
+)
+
+
+def _yaml_cache_path(path: Path) -> Path:
+    """YAML 文件对应的解析缓存路径（按源文件绝对路径散列命名）"""
+    digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()
+    return _YAML_CACHE_DIR / f"{digest}.marshal"
+
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    """
+    读取 YAML 配置，优先使用解析缓存
+
+    缓存以 marshal 格式保存（反序列化不会执行代码），记录源文件路径、
+    mtime_ns 与大小，三者一致时直接使用；缓存损坏或不一致时重新解析
+    YAML 并原子写入新缓存（目录不可写或数据无法 marshal 时仅跳过缓存）。
+    """
+    stat = path.stat()
+    fingerprint = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    cache_path = _yaml_cache_path(path)
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_fingerprint, data = marshal.load(f)
+        if cached_fingerprint == fingerprint:
+            return cast(Dict[str, Any], data)
+    except Exception:
+        # 缓存缺失或损坏均回退到解析 YAML
+        pass
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=_YamlSafeLoader) or {}
+
+    tmp_name = None
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump((fingerprint, data), f)
+        os.replace(tmp_name, cache_path)
+    except (OSError, ValueError):
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+    return data
+
+
+@dataclass(frozen=True, slots=True)
 class ChecklistField:
-    """Checklist 字段定义"""
+    """Checklist 字段定义（加载后不可变）"""
     field: str
     key: str
     label: str
     field_type: str
     required: bool
     priority: str  # P1 or P2
-    options: List[Dict[str, str]] = dataclass_field(default_factory=list)
+    options: Tuple[Dict[str, str], ...] = ()
     ask_prompt: str = ""
     validation: str = ""
+    # 预编译的 validation 正则（无效正则时为 None，校验时跳过）
+    validation_re: Optional[Pattern[str]] = dataclass_field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # 枚举选项的取值（元组保持配置顺序用于提示，集合用于 O(1) 校验）
+    option_value_list: Tuple[Any, ...] = dataclass_field(
+        default=(), init=False, repr=False, compare=False
+    )
+    option_values: FrozenSet[Any] = dataclass_field(
+        default=frozenset(), init=False, repr=False, compare=False
+    )
 
+    def __post_init__(self):
+        options = tuple(self.options)
+        option_value_list = tuple(opt['value'] for opt in options)
+        validation_re = None
+        if self.validation:
+            try:
+                validation_re = re.compile(self.validation)
+            except (re.error, TypeError):
+                validation_re = None
 
-@dataclass
+        object.__setattr__(self, 'options', options)
+        object.__setattr__(self, 'option_value_list', option_value_list)
+        object.__setattr__(self, 'option_values', frozenset(option_value_list))
+        object.__setattr__(self, 'validation_re', validation_re)
+
+
+@dataclass(frozen=True, slots=True)
 class MandatoryAction:
     """强制动作定义"""
     action: str
@@ -36,25 +130,229 @@ class MandatoryAction:
     params: Dict[str, Any] = dataclass_field(default_factory=dict)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StateConstraint:
-    """状态约束定义"""
+    """状态约束定义（加载后不可变）"""
     state_id: str
-    required_checklist_fields: List[str] = dataclass_field(default_factory=list)
-    required_mandatory_actions: List[Union[str, Dict[str, Any]]] = dataclass_field(
-        default_factory=list
+    required_checklist_fields: Tuple[str, ...] = ()
+    required_mandatory_actions: Tuple[Union[str, Dict[str, Any]], ...] = ()
+    triggers: Tuple[Dict[str, Any], ...] = ()
+    # 必需字段集合，用于批量成员判断
+    required_checklist_fields_set: FrozenSet[str] = dataclass_field(
+        default=frozenset(), init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        object.__setattr__(self, 'required_checklist_fields', tuple(self.required_checklist_fields or ()))
+        object.__setattr__(self, 'required_checklist_fields_set', frozenset(self.required_checklist_fields))
+        object.__setattr__(self, 'required_mandatory_actions', tuple(self.required_mandatory_actions or ()))
+        object.__setattr__(self, 'triggers', tuple(self.triggers or ()))
+
+
+class CheckKind(Enum):
+    """检查计划中检查项的类型"""
+    P1_FIELD = "p1_field"
+    STATE_FIELD = "state_field"
+    MANDATORY_ACTION = "mandatory_action"
+    P2_FIELD = "p2_field"
+
+
+# 检查计划：按检查顺序排列的 (key, 类型, 标签)
+CheckPlan = Tuple[Tuple[str, CheckKind, str], ...]
+
+
+def _read_scenario_yaml(scenario_path: Optional[Path], filename: str) -> Dict[str, Any]:
+    """读取场景目录下的配置文件，不存在时返回空字典"""
+    if scenario_path is None:
+        return {}
+    path = scenario_path / filename
+    if not path.exists():
+        return {}
+    return _load_yaml(path)
+
+
+def _parse_checklist_field(field_def: Dict) -> ChecklistField:
+    """解析 Checklist 字段定义"""
+    options = tuple(
+        {'value': opt.get('value', ''), 'label': opt.get('label', '')}
+        for opt in field_def.get('options', [])
+    )
+
+    # 处理 validation 字段（可能是字典或字符串）
+    validation = field_def.get('validation', '')
+    if isinstance(validation, dict):
+        validation = validation.get('regex', '')
+
+    return ChecklistField(
+        field=field_def.get('field', ''),
+        key=field_def.get('key', ''),
+        label=field_def.get('label', ''),
+        field_type=field_def.get('type', 'string'),
+        required=field_def.get('required', False),
+        priority=field_def.get('priority', 'P2'),
+        options=options,
+        ask_prompt=field_def.get('ask_prompt', ''),
+        validation=validation
+    )
+
+
+def _parse_state_constraint(state_def: Dict[str, Any]) -> StateConstraint:
+    """解析 FSM 状态约束"""
+    # 处理 required_mandatory_actions (支持字符串和字典两种格式)
+    required_mas: List[Union[str, Dict[str, Any]]] = []
+    for ma in state_def.get('required_mandatory_actions', []):
+        if isinstance(ma, str):
+            required_mas.append(ma)
+        elif isinstance(ma, dict) and 'action' in ma:
+            required_mas.append(ma['action'])
+
+    return StateConstraint(
+        state_id=state_def['id'],
+        required_checklist_fields=tuple(state_def.get('required_checklist_fields') or ()),
+        required_mandatory_actions=tuple(required_mas),
+        triggers=tuple(state_def.get('triggers') or ())
     )
-    triggers: List[Dict[str, Any]] = dataclass_field(default_factory=list)
 
 
-@dataclass
 class ScenarioConstraints:
-    """场景约束集合"""
-    scenario_type: str
-    p1_fields: List[ChecklistField] = dataclass_field(default_factory=list)
-    p2_fields: List[ChecklistField] = dataclass_field(default_factory=list)
-    mandatory_actions: List[MandatoryAction] = dataclass_field(default_factory=list)
-    state_constraints: Dict[str, StateConstraint] = dataclass_field(default_factory=dict)
+    """
+    场景约束集合
+
+    各配置文件在首次访问对应属性时才解析：
+    - p1_fields / p2_fields（及派生的 *_keys / *_labels / field_by_key）: checklist.yaml
+    - state_constraints: fsm_states.yaml
+    - mandatory_actions: config.yaml 的 mandatory_triggers
+    """
+
+    def __init__(
+        self,
+        scenario_type: str,
+        scenario_path: Optional[Path] = None,
+        *,
+        p1_fields: Optional[Sequence[ChecklistField]] = None,
+        p2_fields: Optional[Sequence[ChecklistField]] = None,
+        mandatory_actions: Optional[Sequence[MandatoryAction]] = None,
+        state_constraints: Optional[Dict[str, StateConstraint]] = None,
+    ):
+        self.scenario_type = scenario_type
+        self.scenario_path = scenario_path
+
+        # 显式传入的约束直接覆盖对应的惰性属性
+        explicit = {
+            'p1_fields': None if p1_fields is None else tuple(p1_fields),
+            'p2_fields': None if p2_fields is None else tuple(p2_fields),
+            'mandatory_actions': None if mandatory_actions is None else tuple(mandatory_actions),
+            'state_constraints': state_constraints,
+        }
+        for name, value in explicit.items():
+            if value is not None:
+                self.__dict__[name] = value
+
+    def __repr__(self) -> str:
+        return f"ScenarioConstraints(scenario_type={self.scenario_type!r}, scenario_path={self.scenario_path!r})"
+
+    @cached_property
+    def _checklist(self) -> Dict[str, Any]:
+        checklist = _read_scenario_yaml(self.scenario_path, "checklist.yaml").get('checklist', {})
+        return cast(Dict[str, Any], checklist)
+
+    @cached_property
+    def p1_fields(self) -> Tuple[ChecklistField, ...]:
+        return tuple(_parse_checklist_field(d) for d in self._checklist.get('p1_fields', []))
+
+    @cached_property
+    def p2_fields(self) -> Tuple[ChecklistField, ...]:
+        return tuple(_parse_checklist_field(d) for d in self._checklist.get('p2_fields', []))
+
+    @cached_property
+    def p1_keys(self) -> Tuple[str, ...]:
+        return tuple(f.key for f in self.p1_fields)
+
+    @cached_property
+    def p1_labels(self) -> Mapping[str, str]:
+        return MappingProxyType({f.key: f.label for f in self.p1_fields})
+
+    @cached_property
+    def p2_keys(self) -> Tuple[str, ...]:
+        return tuple(f.key for f in self.p2_fields)
+
+    @cached_property
+    def p2_labels(self) -> Mapping[str, str]:
+        return MappingProxyType({f.key: f.label for f in self.p2_fields})
+
+    @cached_property
+    def field_by_key(self) -> Mapping[str, ChecklistField]:
+        # 同名 key 以先出现的字段为准（P1 优先于 P2）
+        index: Dict[str, ChecklistField] = {}
+        for f in chain(self.p1_fields, self.p2_fields):
+            index.setdefault(f.key, f)
+        return MappingProxyType(index)
+
+    @cached_property
+    def state_constraints(self) -> Dict[str, StateConstraint]:
+        fsm_config = _read_scenario_yaml(self.scenario_path, "fsm_states.yaml")
+        return {
+            state_def['id']: _parse_state_constraint(state_def)
+            for state_def in fsm_config.get('fsm_states', [])
+            if state_def.get('id')
+        }
+
+    @cached_property
+    def _check_plans(self) -> Dict[Tuple[str, bool], CheckPlan]:
+        return {}
+
+    def check_plan(self, fsm_state: str, strict_mode: bool = False) -> CheckPlan:
+        """
+        获取指定状态的检查计划（按状态与模式缓存）
+
+        依次包含 P1 字段、状态必需字段、状态强制动作，
+        严格模式下再追加 P2 字段，供检查器单次遍历。
+        """
+        plan_key = (fsm_state, strict_mode)
+        plan = self._check_plans.get(plan_key)
+        if plan is None:
+            plan = self._build_check_plan(fsm_state, strict_mode)
+            self._check_plans[plan_key] = plan
+        return plan
+
+    def _build_check_plan(self, fsm_state: str, strict_mode: bool) -> CheckPlan:
+        plan: List[Tuple[str, CheckKind, str]] = [
+            (key, CheckKind.P1_FIELD, self.p1_labels[key]) for key in self.p1_keys
+        ]
+
+        state_constraint = self.state_constraints.get(fsm_state)
+        if state_constraint:
+            plan.extend(
+                (field_name, CheckKind.STATE_FIELD, field_name)
+                for field_name in state_constraint.required_checklist_fields
+            )
+            for action in state_constraint.required_mandatory_actions:
+                # 支持两种格式：字符串 "action_name" 或 {"action": "action_name", ...}
+                action_key = action if isinstance(action, str) else action.get('action', '')
+                if action_key:
+                    plan.append((action_key, CheckKind.MANDATORY_ACTION, action_key))
+
+        if strict_mode:
+            plan.extend((key, CheckKind.P2_FIELD, self.p2_labels[key]) for key in self.p2_keys)
+
+        return tuple(plan)
+
+    @cached_property
+    def mandatory_actions(self) -> Tuple[MandatoryAction, ...]:
+        # 统一来源：config.yaml 的 mandatory_triggers
+        config = _read_scenario_yaml(self.scenario_path, "config.yaml")
+        actions = []
+        for trigger in config.get("mandatory_triggers", []) or []:
+            action = trigger.get("action", "")
+            condition = trigger.get("condition", {})
+            if action and condition:
+                actions.append(MandatoryAction(
+                    action=action,
+                    condition=condition,
+                    description=trigger.get("description", ""),
+                    params=trigger.get("params", {})
+                ))
+        return tuple(actions)
 
 
 class ConstraintLoader:
@@ -79,6 +377,9 @@ class ConstraintLoader:
         """
         加载指定场景的约束配置
 
+        只校验配置目录与 checklist.yaml 是否存在，各 YAML 文件
+        在首次访问对应约束时才解析（见 ScenarioConstraints）。
+
         Args:
             scenario_type: 场景类型 (如 'oil_spill')
 
@@ -97,135 +398,63 @@ class ConstraintLoader:
         if not scenario_path.exists():
             raise FileNotFoundError(f"场景配置不存在: {scenario_path}")
 
-        # 加载 config.yaml
-        config_file = scenario_path / "config.yaml"
-        config: Dict[str, Any] = {}
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f) or {}
-
-        # 加载 checklist.yaml
         checklist_file = scenario_path / "checklist.yaml"
         if not checklist_file.exists():
             raise FileNotFoundError(f"Checklist 配置文件不存在: {checklist_file}")
 
-        with open(checklist_file, 'r', encoding='utf-8') as f:
-            checklist_config: Dict[str, Any] = yaml.safe_load(f) or {}
-
-        # 加载 fsm_states.yaml
-        fsm_file = scenario_path / "fsm_states.yaml"
-        fsm_config: Dict[str, Any] = {}
-        if fsm_file.exists():
-            with open(fsm_file, 'r', encoding='utf-8') as f:
-                fsm_config = yaml.safe_load(f) or {}
-
-        # 构建约束对象
-        constraints = self._build_constraints(scenario_type, checklist_config, fsm_config, config)
-
-        # 缓存
+        # 构建约束对象并缓存
+        constraints = ScenarioConstraints(scenario_type, scenario_path)
         self._cache[scenario_type] = constraints
 
         return constraints
 
-    def _build_constraints(
-        self,
-        scenario_type: str,
-        checklist_config: Dict[str, Any],
-        fsm_config: Dict[str, Any],
-        config: Dict[str, Any],
-    ) -> ScenarioConstraints:
-        """构建约束对象"""
-        constraints = ScenarioConstraints(scenario_type=scenario_type)
-
-        # 解析 checklist 配置
-        checklist = checklist_config.get('checklist', {})
-        done_condition = checklist.get('done_condition', {})
-
-        # P1 字段
-        for field_def in checklist.get('p1_fields', []):
-            constraints.p1_fields.append(self._parse_checklist_field(field_def))
-
-        # P2 字段
-        for field_def in checklist.get('p2_fields', []):
-            constraints.p2_fields.append(self._parse_checklist_field(field_def))
-
-        # 解析 FSM 状态约束
-        for state_def in fsm_config.get('fsm_states', []):
-            state_id = state_def.get('id')
-            if state_id:
-                # 处理 required_mandatory_actions (支持字符串和字典两种格式)
-                required_mas: List[Union[str, Dict[str, Any]]] = []
-                for ma in state_def.get('required_mandatory_actions', []):
-                    if isinstance(ma, str):
-                        required_mas.append(ma)
-                    elif isinstance(ma, dict) and 'action' in ma:
-                        required_mas.append(ma['action'])
-
-                state_constraint = StateConstraint(
-                    state_id=state_id,
-                    required_checklist_fields=state_def.get('required_checklist_fields', []),
-                    required_mandatory_actions=required_mas,
-                    triggers=state_def.get('triggers', [])
-                )
-                constraints.state_constraints[state_id] = state_constraint
-
-        # 解析强制动作（统一来源：config.yaml 的 mandatory_triggers）
-        for trigger in config.get("mandatory_triggers", []) or []:
-            action = trigger.get("action", "")
-            condition = trigger.get("condition", {})
-            if action and condition:
-                constraints.mandatory_actions.append(MandatoryAction(
-                    action=action,
-                    condition=condition,
-                    description=trigger.get("description", ""),
-                    params=trigger.get("params", {})
-                ))
+    def preload(self, scenario_types: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        预加载场景约束并解析其全部配置文件
 
-        return constraints
+        多进程部署时，首个进程写入的 YAML 解析缓存由其余进程直接复用；
+        在 fork 之前调用（如 gunicorn --preload）还可让子进程共享已解析的约束对象。
 
-    def _parse_checklist_field(self, field_def: Dict) -> ChecklistField:
-        """解析 Checklist 字段定义"""
-        options = []
-        for opt in field_def.get('options', []):
-            options.append({
-                'value': opt.get('value', ''),
-                'label': opt.get('label', '')
-            })
-
-        # 处理 validation 字段（可能是字典或字符串）
-        validation = field_def.get('validation', '')
-        if isinstance(validation, dict):
-            validation = validation.get('regex', '')
-
-        return ChecklistField(
-            field=field_def.get('field', ''),
-            key=field_def.get('key', ''),
-            label=field_def.get('label', ''),
-            field_type=field_def.get('type', 'string'),
-            required=field_def.get('required', False),
-            priority=field_def.get('priority', 'P2'),
-            options=options,
-            ask_prompt=field_def.get('ask_prompt', ''),
-            validation=validation
-        )
+        Args:
+            scenario_types: 要预加载的场景，默认为 base_path 下所有包含 checklist.yaml 的目录
+
+        Returns:
+            已预加载的场景类型列表
+        """
+        if scenario_types is None:
+            if not self.base_path.is_dir():
+                return []
+            scenario_types = sorted(
+                path.name for path in self.base_path.iterdir()
+                if (path / "checklist.yaml").is_file()
+            )
+
+        loaded = []
+        for scenario_type in scenario_types:
+            constraints = self.load(scenario_type)
+            constraints.field_by_key
+            constraints.state_constraints
+            constraints.mandatory_actions
+            loaded.append(scenario_type)
+        return loaded
 
     def get_required_fields_for_state(self, scenario_type: str, state: str) -> List[str]:
         """获取指定状态必需的 checklist 字段"""
         constraints = self.load(scenario_type)
         state_constraint = constraints.state_constraints.get(state)
         if state_constraint:
-            return state_constraint.required_checklist_fields
+            return list(state_constraint.required_checklist_fields)
         return []
 
     def get_all_p1_keys(self, scenario_type: str) -> List[str]:
-        """获取所有 P1 字段的 key"""
+        """获取所有 P1 字段的 key（仅解析 checklist.yaml）"""
         constraints = self.load(scenario_type)
-        return [f.key for f in constraints.p1_fields]
+        return list(constraints.p1_keys)
 
     def get_all_p2_keys(self, scenario_type: str) -> List[str]:
-        """获取所有 P2 字段的 key"""
+        """获取所有 P2 字段的 key（仅解析 checklist.yaml）"""
         constraints = self.load(scenario_type)
-        return [f.key for f in constraints.p2_fields]
+        return list(constraints.p2_keys)
 
     def clear_cache(self):
         """清除缓存"""
@@ -234,13 +463,17 @@ class ConstraintLoader:
 
 # 全局加载器实例
 _default_loader: Optional[ConstraintLoader] = None
+_default_loader_lock = threading.Lock()
 
 
 def get_loader() -> ConstraintLoader:
     """获取全局约束加载器实例"""
     global _default_loader
     if _default_loader is None:
-        _default_loader = ConstraintLoader()
+        # 双重检查：并发首次调用时只创建一个实例，保证共享同一份缓存
+        with _default_loader_lock:
+            if _default_loader is None:
+                _default_loader = ConstraintLoader()
     return _default_loader
 
 
@@ -3,8 +3,12 @@
 
 展示如何在Agent中集成拓扑图分析和航班影响预测
 """
+import io
 import sys
 import os
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from tools.spatial.topology_loader import get_topology_loader
@@ -12,6 +16,20 @@ from tools.spatial.calculate_impact_zone import CalculateImpactZoneTool
 from tools.spatial.predict_flight_impact import PredictFlightImpactTool
 
 
+# 处置建议规则表：(触发条件, 建议)，按顺序匹配，条件基于单个场景的分析结果
+RECOMMENDATION_RULES: List[Tuple[Callable[[Dict[str, Any]], bool], Tuple[str, ...]]] = [
+    # 基于风险等级
+    (lambda f: f["fluid_type"] == "FUEL", ("立即通知消防部门", "建立300米安全隔离区")),
+    # 基于影响范围
+    (lambda f: bool(f["affected_runways"]), ("跑道受影响，建议启用备用跑道", "协调进离港航班调整")),
+    # 基于航班影响
+    (lambda f: f["avg_delay"] >= 60, ("延误严重，建议发布机场通告",)),
+    (lambda f: 30 <= f["avg_delay"] < 60, ("延误较重，建议向旅客发布延误信息",)),
+    # 基于位置
+    (lambda f: "stand" in f["position"], ("机位封锁，需安排备用机位",)),
+]
+
+
 def demo_position_based_impact_analysis():
     """演示基于位置的漏油影响分析"""
     print("=" * 70)
@@ -37,11 +55,12 @@ def demo_position_based_impact_analysis():
         }
     ]
 
-    for i, scenario in enumerate(test_positions, 1):
-        print(f"\n{'='*70}")
-        print(f"场景 {i}: {scenario['description']}")
-        print(f"{'='*70}")
+    # 所有场景共用工具实例（航班预测工具会缓存已解析的航班计划）
+    impact_tool = CalculateImpactZoneTool()
+    predict_tool = PredictFlightImpactTool()
 
+    def run_one(scenario: Dict[str, str]) -> Dict[str, Any]:
+        """执行单个场景的分析（场景间互不依赖，可并行）"""
         # 创建模拟状态
         state = {
             "incident": {
@@ -54,14 +73,53 @@ def demo_position_based_impact_analysis():
         }
 
         # Step 1: 计算影响范围
-        print(f"\n[步骤 1] 计算影响范围...")
-        impact_tool = CalculateImpactZoneTool()
         impact_result = impact_tool.execute(state, {})
+        outcome: Dict[str, Any] = {
+            "observation": impact_result.get("observation", ""),
+            "spatial": impact_result.get("spatial_analysis", {}),
+        }
+        spatial = outcome["spatial"]
+        if not spatial:
+            return outcome
+
+        # Step 2: 预测航班影响
+        state["spatial_analysis"] = spatial
+        predict_result = predict_tool.execute(state, {"time_window": 2})
+        outcome["prediction_obs"] = predict_result.get("observation", "")
+        flight_impact = predict_result.get("flight_impact", {})
+        outcome["flight_impact"] = flight_impact
+
+        # Step 3: 生成处置建议
+        stats = flight_impact.get("statistics") if flight_impact else None
+        facts = {
+            "fluid_type": scenario["fluid_type"],
+            "position": scenario["position"].lower(),
+            "affected_runways": spatial.get("affected_runways"),
+            "avg_delay": stats.get("average_delay_minutes", 0) if stats else 0,
+        }
+        recommendations = [
+            rec
+            for condition, recs in RECOMMENDATION_RULES
+            if condition(facts)
+            for rec in recs
+        ]
+
+        outcome["recommendations"] = recommendations
+        return outcome
+
+    # 并行执行各场景，再按原顺序输出
+    with ThreadPoolExecutor(max_workers=min(len(test_positions), os.cpu_count() or 1)) as executor:
+        outcomes = list(executor.map(run_one, test_positions))
 
-        observation = impact_result.get("observation", "")
-        print(f"观察结果: {observation}")
+    for i, (scenario, outcome) in enumerate(zip(test_positions, outcomes), 1):
+        print(f"\n{'='*70}")
+        print(f"场景 {i}: {scenario['description']}")
+        print(f"{'='*70}")
 
-        spatial = impact_result.get("spatial_analysis", {})
+        print(f"\n[步骤 1] 计算影响范围...")
+        print(f"观察结果: {outcome['observation']}")
+
+        spatial = outcome["spatial"]
         if spatial:
             print(f"\n影响范围详情:")
             print(f"  起始节点: {spatial.get('anchor_node')}")
@@ -70,20 +128,11 @@ def demo_position_based_impact_analysis():
             print(f"  受影响滑行道: {len(spatial.get('affected_taxiways', []))}")
             print(f"  受影响跑道: {len(spatial.get('affected_runways', []))}")
 
-            # Step 2: 预测航班影响
             print(f"\n[步骤 2] 预测航班影响...")
-
-            # 更新状态
-            state["spatial_analysis"] = spatial
-
-            predict_tool = PredictFlightImpactTool()
-            predict_result = predict_tool.execute(state, {"time_window": 2})
-
-            prediction_obs = predict_result.get("observation", "")
-            print(f"预测结果: {prediction_obs}")
+            print(f"预测结果: {outcome['prediction_obs']}")
 
             # 显示详细统计
-            flight_impact = predict_result.get("flight_impact", {})
+            flight_impact = outcome["flight_impact"]
             if flight_impact:
                 stats = flight_impact.get("statistics", {})
                 if stats:
@@ -99,35 +148,8 @@ def demo_position_based_impact_analysis():
                         print(f"  中等延误: {severity.get('medium', 0)} 架次")
                         print(f"  轻微延误: {severity.get('low', 0)} 架次")
 
-            # Step 3: 生成处置建议
             print(f"\n[步骤 3] 处置建议:")
-
-            recommendations = []
-
-            # 基于风险等级
-            if scenario["fluid_type"] == "FUEL":
-                recommendations.append("立即通知消防部门")
-                recommendations.append("建立300米安全隔离区")
-
-            # 基于影响范围
-            if spatial.get("affected_runways"):
-                recommendations.append("跑道受影响，建议启用备用跑道")
-                recommendations.append("协调进离港航班调整")
-
-            # 基于航班影响
-            if flight_impact and flight_impact.get("statistics"):
-                stats = flight_impact["statistics"]
-                avg_delay = stats.get("average_delay_minutes", 0)
-                if avg_delay >= 60:
-                    recommendations.append("延误严重，建议发布机场通告")
-                elif avg_delay >= 30:
-                    recommendations.append("延误较重，建议向旅客发布延误信息")
-
-            # 基于位置
-            if "stand" in scenario["position"].lower():
-                recommendations.append("机位封锁，需安排备用机位")
-
-            for rec in recommendations:
+            for rec in outcome["recommendations"]:
                 print(f"  - {rec}")
 
         print()
@@ -241,4 +263,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # 输出先写入内存缓冲，结束时一次性写出，避免逐行加锁/刷新
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            main()
+    finally:
+        sys.stdout.write(buf.getvalue())
@@ -5,7 +5,9 @@ get_weather 工具演示脚本
 展示如何使用 get_weather 工具查询机场气象信息
 """
 
+import io
 import sys
+from contextlib import redirect_stdout
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -231,4 +233,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # 输出先写入内存缓冲，结束时一次性写出，避免逐行加锁/刷新
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            main()
+    finally:
+        sys.stdout.write(buf.getvalue())
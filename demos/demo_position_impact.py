@@ -3,8 +3,12 @@
 
 展示漏油发生在不同位置（机位/滑行道/跑道）时对机场运行的不同影响
 """
+import io
 import sys
 import os
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from tools.spatial.analyze_position_impact import AnalyzePositionImpactTool
@@ -58,12 +62,8 @@ def demo_position_impact_analysis():
 
     tool = AnalyzePositionImpactTool()
 
-    for i, scenario in enumerate(scenarios, 1):
-        print("=" * 80)
-        print(f"{scenario['name']}")
-        print(f"{scenario['description']}")
-        print("=" * 80)
-
+    def run_one(scenario: Dict[str, str]) -> Dict[str, Any]:
+        """执行单个场景的分析（场景间互不依赖，可并行）"""
         # 创建模拟状态
         state = {
             "incident": {
@@ -74,9 +74,17 @@ def demo_position_impact_analysis():
                 "level": scenario["risk_level"]
             }
         }
+        return tool.execute(state, {})
 
-        # 执行分析
-        result = tool.execute(state, {})
+    # 并行执行分析，再按原顺序输出
+    with ThreadPoolExecutor(max_workers=min(len(scenarios), os.cpu_count() or 1)) as executor:
+        results = list(executor.map(run_one, scenarios))
+
+    for scenario, result in zip(scenarios, results):
+        print("=" * 80)
+        print(f"{scenario['name']}")
+        print(f"{scenario['description']}")
+        print("=" * 80)
 
         # 输出结果
         if result.get("observation"):
@@ -107,9 +115,8 @@ def demo_comparison_summary():
 
     tool = AnalyzePositionImpactTool()
 
-    print(f"{'位置类型':<10} {'油液类型':<10} {'风险等级':<10} {'封闭时间(分钟)':<15} {'严重程度':<10}")
-    print("-" * 80)
-
+    # 先收集各场景的分析结果，再统一格式化输出
+    rows = []
     for position, fluid_type, risk_level, pos_type in scenarios:
         state = {
             "incident": {
@@ -122,11 +129,19 @@ def demo_comparison_summary():
         result = tool.execute(state, {})
 
         if result.get("position_impact_analysis"):
-            analysis = result["position_impact_analysis"]
-            direct = analysis["direct_impact"]
+            direct = result["position_impact_analysis"]["direct_impact"]
+            rows.append((pos_type, fluid_type, risk_level,
+                         direct['closure_time_minutes'], direct['severity_score']))
 
-            print(f"{pos_type:<10} {fluid_type:<10} {risk_level:<10} "
-                  f"{direct['closure_time_minutes']:<15} {direct['severity_score']:<10.2f}")
+    lines = [
+        f"{'位置类型':<10} {'油液类型':<10} {'风险等级':<10} {'封闭时间(分钟)':<15} {'严重程度':<10}",
+        "-" * 80,
+    ]
+    lines.extend(
+        f"{pos_type:<10} {fluid_type:<10} {risk_level:<10} {closure_time:<15} {severity_score:<10.2f}"
+        for pos_type, fluid_type, risk_level, closure_time, severity_score in rows
+    )
+    print("\n".join(lines))
 
     print()
     print("结论:")
@@ -137,8 +152,14 @@ def demo_comparison_summary():
 
 
 if __name__ == "__main__":
-    # 运行完整演示
-    demo_position_impact_analysis()
-
-    # 显示对比总结
-    demo_comparison_summary()
+    # 输出先写入内存缓冲，结束时一次性写出，避免逐行加锁/刷新
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            # 运行完整演示
+            demo_position_impact_analysis()
+
+            # 显示对比总结
+            demo_comparison_summary()
+    finally:
+        sys.stdout.write(buf.getvalue())
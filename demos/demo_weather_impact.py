@@ -1,7 +1,9 @@
 """
 气象影响评估演示脚本
 """
+import io
 import sys
+from contextlib import redirect_stdout
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -115,8 +117,14 @@ def demo_scenario_3():
 
 
 if __name__ == "__main__":
-    demo_scenario_1()
-    print("\n")
-    demo_scenario_2()
-    print("\n")
-    demo_scenario_3()
+    # 输出先写入内存缓冲，结束时一次性写出，避免逐行加锁/刷新
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            demo_scenario_1()
+            print("\n")
+            demo_scenario_2()
+            print("\n")
+            demo_scenario_3()
+    finally:
+        sys.stdout.write(buf.getvalue())
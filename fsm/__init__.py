@@ -27,28 +27,46 @@ FSM 验证模块
         print("待执行动作:", result.pending_actions)
 """
 
-from .states import (
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .states import (
+        FSMStateEnum,
+        StateDefinition,
+        TransitionRule,
+        Precondition,
+        MandatoryAction,
+        FSMTransitionRecord,
+        FSMValidationResult,
+        DEFAULT_STATE_DEFINITIONS,
+        DEFAULT_TRANSITIONS,
+        DEFAULT_MANDATORY_ACTIONS,
+    )
+    from .engine import FSMEngine
+    from .validator import FSMValidator, create_validator
+
+# 导出名称 -> 所在子模块（首次访问时才导入，避免 import fsm 时加载全部子模块）
+_LAZY_EXPORTS = {
+    # 核心类
+    "FSMEngine": ".engine",
+    "FSMValidator": ".validator",
+    # 工厂函数
+    "create_validator": ".validator",
     # 枚举
-    FSMStateEnum,
+    "FSMStateEnum": ".states",
     # 数据类
-    StateDefinition,
-    TransitionRule,
-    Precondition,
-    MandatoryAction,
-    FSMTransitionRecord,
-    FSMValidationResult,
+    "StateDefinition": ".states",
+    "TransitionRule": ".states",
+    "Precondition": ".states",
+    "MandatoryAction": ".states",
+    "FSMTransitionRecord": ".states",
+    "FSMValidationResult": ".states",
     # 默认配置
-    DEFAULT_STATE_DEFINITIONS,
-    DEFAULT_TRANSITIONS,
-    DEFAULT_MANDATORY_ACTIONS,
-)
-
-from .engine import FSMEngine
-
-from .validator import (
-    FSMValidator,
-    create_validator,
-)
+    "DEFAULT_STATE_DEFINITIONS": ".states",
+    "DEFAULT_TRANSITIONS": ".states",
+    "DEFAULT_MANDATORY_ACTIONS": ".states",
+}
 
 __all__ = [
     # 核心类
@@ -70,3 +88,13 @@ __all__ = [
     "DEFAULT_TRANSITIONS",
     "DEFAULT_MANDATORY_ACTIONS",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'fsm' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # 缓存到模块命名空间，后续访问不再经过 __getattr__
+    globals()[name] = value
+    return value
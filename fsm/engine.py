@@ -13,11 +13,17 @@ FSM 引擎
 - 支持从 YAML 配置加载
 """
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, List, Mapping, Optional, Sequence, Tuple
 from datetime import datetime
 import yaml  # type: ignore[import-untyped]
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader  # libyaml C 实现
+except ImportError:  # pragma: no cover - 未编译 libyaml 时回退纯 Python 实现
+    from yaml import SafeLoader as _YamlSafeLoader
+
 from agent.state import risk_level_rank
 
 from .states import (
@@ -29,11 +35,112 @@ from .states import (
     FSMValidationResult,
     DEFAULT_STATE_DEFINITIONS,
     DEFAULT_TRANSITIONS,
+    DEFAULT_TRANSITION_SETS,
     DEFAULT_MANDATORY_ACTIONS,
 )
 
 logger = logging.getLogger(__name__)
 
+# 风险等级取值很少，缓存排序结果（入参为 str/None 等可哈希值）
+_risk_level_rank = lru_cache(maxsize=16)(risk_level_rank)
+
+# 状态 ID 常量（避免在方法中反复访问枚举 .value）
+_S_INIT = FSMStateEnum.INIT.value
+_S_P1 = FSMStateEnum.P1_RISK_ASSESS.value
+_S_P2 = FSMStateEnum.P2_IMMEDIATE_CONTROL.value
+_S_P3 = FSMStateEnum.P3_RESOURCE_DISPATCH.value
+_S_P4 = FSMStateEnum.P4_AREA_ISOLATION.value
+_S_P5 = FSMStateEnum.P5_CLEANUP.value
+_S_P6 = FSMStateEnum.P6_VERIFICATION.value
+_S_P7 = FSMStateEnum.P7_RECOVERY.value
+_S_P8 = FSMStateEnum.P8_CLOSE.value
+_S_COMPLETED = FSMStateEnum.COMPLETED.value
+
+# 处理进度的状态顺序及各状态下标
+_STATE_ORDER: Tuple[str, ...] = (
+    _S_INIT,
+    _S_P1,
+    _S_P2,
+    _S_P3,
+    _S_P4,
+    _S_P5,
+    _S_P6,
+    _S_P7,
+    _S_P8,
+    _S_COMPLETED,
+)
+_STATE_INDEX: Dict[str, int] = {state: index for index, state in enumerate(_STATE_ORDER)}
+
+_EMPTY_TRANSITIONS: FrozenSet[str] = frozenset()
+
+# 场景配置不可用时的 P1 字段兜底
+_DEFAULT_P1_FIELDS: Tuple[str, ...] = ("fluid_type", "continuous", "engine_status", "position")
+
+# 已解析 YAML 缓存：绝对路径 -> ((mtime_ns, 文件大小), 配置字典)（只读，勿修改）
+_YAML_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def _load_yaml_cached(path: Path) -> Dict[str, Any]:
+    """
+    读取 YAML 配置，同一文件未修改时直接复用上次解析结果
+
+    以路径为键，记录 (mtime_ns, 大小)；文件变更后重新解析并替换该路径的缓存项。
+    """
+    stat = path.stat()
+    key = str(path.resolve())
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.load(f, Loader=_YamlSafeLoader) or {}
+    _YAML_CACHE[key] = (fingerprint, config)
+    return config
+
+
+# infer_state 判定标志位
+_F_FINAL_REPORT = 1 << 6     # 已生成最终报告
+_F_P1_COMPLETE = 1 << 5      # P1 字段全部收集
+_F_RISK_ASSESSED = 1 << 4    # 已完成风险评估
+_F_HIGH_RISK = 1 << 3        # 风险等级 R3 及以上
+_F_FIRE_NOTIFIED = 1 << 2    # 已通知消防
+_F_ISOLATED = 1 << 1         # 已有隔离区域
+_F_INFO_READY = 1            # 已有油液类型和位置，可进行风险评估
+
+
+def _infer_from_flags(flags: int) -> str:
+    """由判定标志位推断 FSM 状态（从后往前，优先匹配更高级的状态）"""
+    # 检查是否完成报告生成
+    if flags & _F_FINAL_REPORT:
+        return _S_COMPLETED
+
+    # 完成所有必要步骤，可以关闭
+    if flags & _F_P1_COMPLETE and flags & _F_RISK_ASSESSED:
+        # 检查是否有区域隔离
+        if flags & _F_ISOLATED:
+            return _S_P4
+        return _S_P8
+
+    # 检查是否完成风险评估
+    if flags & _F_RISK_ASSESSED:
+        if flags & _F_HIGH_RISK:
+            if flags & _F_FIRE_NOTIFIED:
+                return _S_P3
+            return _S_P2
+        # 中低风险直接进入区域隔离
+        return _S_P4
+
+    # 检查是否有足够信息进行风险评估
+    if flags & _F_INFO_READY:
+        return _S_P1
+
+    return _S_INIT
+
+
+# 标志位组合 -> 推断状态，模块加载时一次性枚举生成
+_INFER_TABLE: Tuple[str, ...] = tuple(_infer_from_flags(flags) for flags in range(1 << 7))
+
 
 class FSMEngine:
     """
@@ -59,11 +166,19 @@ class FSMEngine:
             config_path: 配置文件路径，如果提供则从 YAML 加载
         """
         self.scenario_type = scenario_type
-        self.current_state = FSMStateEnum.INIT.value
+        self.current_state = _S_INIT
         self.history: List[FSMTransitionRecord] = []
-        self.state_definitions: Dict[str, StateDefinition] = {}
-        self.transitions: Dict[str, List[str]] = {}
+        # get_history 的序列化缓存，_history_dicts[i] 对应 _history_records[i]
+        self._history_records: List[FSMTransitionRecord] = []
+        self._history_dicts: List[Dict[str, Any]] = []
+        self.state_definitions: Mapping[str, StateDefinition] = {}
+        self.transitions: Mapping[str, Sequence[str]] = {}
+        # 与 transitions 对应的目标集合，用于合法性判断
+        self._transition_sets: Mapping[str, FrozenSet[str]] = {}
         self.mandatory_actions: List[MandatoryAction] = []
+        # 场景类型 -> P1 字段（首次推断时从约束加载器读取）
+        self._p1_fields_cache: Dict[str, Tuple[str, ...]] = {}
+        self._p1_field_sets: Dict[str, FrozenSet[str]] = {}
 
         # 加载配置
         if config_path:
@@ -73,13 +188,15 @@ class FSMEngine:
 
     def _load_defaults(self):
         """加载默认配置"""
-        self.state_definitions = DEFAULT_STATE_DEFINITIONS.copy()
-        self.transitions = DEFAULT_TRANSITIONS.copy()
+        # 默认配置只读，直接共享引用
+        self.state_definitions = DEFAULT_STATE_DEFINITIONS
+        self.transitions = DEFAULT_TRANSITIONS
+        self._transition_sets = DEFAULT_TRANSITION_SETS
         mandatory_from_config = self._load_mandatory_actions_from_config()
         if mandatory_from_config:
             self.mandatory_actions = mandatory_from_config
         else:
-            self.mandatory_actions = DEFAULT_MANDATORY_ACTIONS.copy()
+            self.mandatory_actions = list(DEFAULT_MANDATORY_ACTIONS)
 
     def _load_from_yaml(self, config_path: str):
         """从 YAML 文件加载配置"""
@@ -88,29 +205,31 @@ class FSMEngine:
             self._load_defaults()
             return
 
-        with open(path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+        config = _load_yaml_cached(path)
 
         # 解析状态定义
-        self.state_definitions = {}
+        state_definitions: Dict[str, StateDefinition] = {}
         fsm_states = config.get("fsm_states", [])
         for state_config in fsm_states:
             state_id = state_config.get("id")
-            self.state_definitions[state_id] = StateDefinition(
+            state_definitions[state_id] = StateDefinition(
                 id=state_id,
                 name=state_config.get("name", state_id),
                 description=state_config.get("description", ""),
-                preconditions=state_config.get("preconditions", []),
-                triggers=state_config.get("triggers", []),
+                # 复制为元组/新字典，避免与 _YAML_CACHE 中的共享对象产生别名
+                preconditions=tuple(state_config.get("preconditions") or ()),
+                triggers=tuple(dict(trigger) for trigger in state_config.get("triggers") or ()),
             )
 
         # 如果没有定义完整的状态，使用默认值补充
         for state_id, default_def in DEFAULT_STATE_DEFINITIONS.items():
-            if state_id not in self.state_definitions:
-                self.state_definitions[state_id] = default_def
+            if state_id not in state_definitions:
+                state_definitions[state_id] = default_def
+        self.state_definitions = state_definitions
 
         # 使用默认转换规则
-        self.transitions = DEFAULT_TRANSITIONS.copy()
+        self.transitions = DEFAULT_TRANSITIONS
+        self._transition_sets = DEFAULT_TRANSITION_SETS
 
         # 解析强制动作
         self.mandatory_actions = []
@@ -118,9 +237,9 @@ class FSMEngine:
         for trigger in mandatory_triggers:
             self.mandatory_actions.append(MandatoryAction(
                 name=trigger.get("name", ""),
-                condition=trigger.get("condition", {}),
+                condition=dict(trigger.get("condition") or {}),
                 action=trigger.get("action", ""),
-                params=trigger.get("params", {}),
+                params=dict(trigger.get("params") or {}),
                 check_field=trigger.get("check_field", ""),
                 error_message=trigger.get("error_message", ""),
             ))
@@ -131,7 +250,7 @@ class FSMEngine:
             if mandatory_from_config:
                 self.mandatory_actions = mandatory_from_config
             else:
-                self.mandatory_actions = DEFAULT_MANDATORY_ACTIONS.copy()
+                self.mandatory_actions = list(DEFAULT_MANDATORY_ACTIONS)
 
     def _load_mandatory_actions_from_config(self) -> List[MandatoryAction]:
         """从场景配置读取强制动作"""
@@ -144,17 +263,16 @@ class FSMEngine:
         if not config_path.exists():
             return []
 
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f) or {}
+        config = _load_yaml_cached(config_path)
 
         mandatory_triggers = config.get("mandatory_triggers", [])
         actions: List[MandatoryAction] = []
         for trigger in mandatory_triggers:
             actions.append(MandatoryAction(
                 name=trigger.get("name", ""),
-                condition=trigger.get("condition", {}),
+                condition=dict(trigger.get("condition") or {}),
                 action=trigger.get("action", ""),
-                params=trigger.get("params", {}),
+                params=dict(trigger.get("params") or {}),
                 check_field=trigger.get("check_field", ""),
                 error_message=trigger.get("error_message", ""),
             ))
@@ -175,61 +293,75 @@ class FSMEngine:
         Returns:
             推断出的 FSM 状态
         """
-        mandatory = agent_state.get("mandatory_actions_done", {})
-        risk = agent_state.get("risk_assessment", {})
-        spatial = agent_state.get("spatial_analysis", {})
-        checklist = agent_state.get("checklist", {})
-        actions = agent_state.get("actions_taken", [])
-        final_report = agent_state.get("final_report", {})
+        return _INFER_TABLE[self._infer_flags(agent_state)]
 
-        # 从后往前推断状态（优先匹配更高级的状态）
+    def infer_states_batch(self, agent_states: Sequence[Dict[str, Any]]) -> List[str]:
+        """
+        批量推断 FSM 状态（回放/模拟大量 Agent 状态时使用）
 
-        # 检查是否完成报告生成
-        if final_report:
-            return FSMStateEnum.COMPLETED.value
+        Args:
+            agent_states: Agent 状态序列
+
+        Returns:
+            与输入一一对应的推断状态
+        """
+        infer_flags = self._infer_flags
+        return [_INFER_TABLE[infer_flags(agent_state)] for agent_state in agent_states]
+
+    def _infer_flags(self, agent_state: Dict[str, Any]) -> int:
+        """计算 infer_state 的判定标志位"""
+        # 各子字典及其 get 只取一次
+        state_get = agent_state.get
+        mandatory_get = state_get("mandatory_actions_done", {}).get
+        checklist = state_get("checklist", {})
+        checklist_get = checklist.get
+        final_report = state_get("final_report", {})
 
         # 检查 Checklist 和风险评估完成情况
-        p1_fields = self._get_p1_fields(agent_state)
-        p1_complete = all(checklist.get(f, False) for f in p1_fields)
-        risk_assessed = mandatory.get("risk_assessed", False)
-
-        # 完成所有必要步骤，可以关闭
-        if p1_complete and risk_assessed:
-            # 检查是否有区域隔离
-            if spatial.get("isolated_nodes"):
-                return FSMStateEnum.P4_AREA_ISOLATION.value
-            return FSMStateEnum.P8_CLOSE.value
-
-        # 检查是否完成风险评估
-        if risk_assessed:
-            risk_level = risk.get("level", "")
-            if risk_level_rank(risk_level) >= 3:
-                if mandatory.get("fire_dept_notified", False):
-                    return FSMStateEnum.P3_RESOURCE_DISPATCH.value
-                return FSMStateEnum.P2_IMMEDIATE_CONTROL.value
-            # 中低风险直接进入区域隔离
-            return FSMStateEnum.P4_AREA_ISOLATION.value
-
-        # 检查是否有足够信息进行风险评估
-        if checklist.get("fluid_type") and checklist.get("position"):
-            return FSMStateEnum.P1_RISK_ASSESS.value
-
-        return FSMStateEnum.INIT.value
-
-    def _get_p1_fields(self, agent_state: Dict[str, Any]) -> List[str]:
-        """从场景配置获取 P1 字段列表"""
+        p1_complete = self._get_p1_field_set(agent_state) <= {
+            key for key, done in checklist.items() if done
+        }
+        risk_assessed = bool(mandatory_get("risk_assessed", False))
+        # 仅在已完成风险评估时才需要风险等级
+        high_risk = risk_assessed and _risk_level_rank(
+            state_get("risk_assessment", {}).get("level", "")
+        ) >= 3
+
+        return (
+            (_F_FINAL_REPORT if final_report else 0)
+            | (_F_P1_COMPLETE if p1_complete else 0)
+            | (_F_RISK_ASSESSED if risk_assessed else 0)
+            | (_F_HIGH_RISK if high_risk else 0)
+            | (_F_FIRE_NOTIFIED if mandatory_get("fire_dept_notified", False) else 0)
+            | (_F_ISOLATED if state_get("spatial_analysis", {}).get("isolated_nodes") else 0)
+            | (_F_INFO_READY if checklist_get("fluid_type") and checklist_get("position") else 0)
+        )
+
+    def _get_p1_fields(self, agent_state: Dict[str, Any]) -> Tuple[str, ...]:
+        """从场景配置获取 P1 字段列表（按场景类型缓存）"""
         scenario_type = agent_state.get("scenario_type", self.scenario_type)
+        cached = self._p1_fields_cache.get(scenario_type)
+        if cached is not None:
+            return cached
+
         try:
             from constraints.loader import get_loader
-            return get_loader().get_all_p1_keys(scenario_type)
+            p1_fields = tuple(get_loader().get_all_p1_keys(scenario_type))
         except Exception as exc:
-            logger.warning(
-                "Failed to load P1 fields for scenario %s: %s",
-                scenario_type,
-                exc,
-                exc_info=True,
-            )
-            return ["fluid_type", "continuous", "engine_status", "position"]
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Failed to load P1 fields for scenario %s: %r", scenario_type, exc)
+            p1_fields = _DEFAULT_P1_FIELDS
+        self._p1_fields_cache[scenario_type] = p1_fields
+        return p1_fields
+
+    def _get_p1_field_set(self, agent_state: Dict[str, Any]) -> FrozenSet[str]:
+        """P1 字段集合（用于子集判断，按场景类型缓存）"""
+        scenario_type = agent_state.get("scenario_type", self.scenario_type)
+        cached = self._p1_field_sets.get(scenario_type)
+        if cached is None:
+            cached = frozenset(self._get_p1_fields(agent_state))
+            self._p1_field_sets[scenario_type] = cached
+        return cached
 
     def can_transition(self, from_state: str, to_state: str) -> bool:
         """
@@ -245,8 +377,7 @@ class FSMEngine:
         if from_state == to_state:
             return True
 
-        allowed = self.transitions.get(from_state, [])
-        return to_state in allowed
+        return to_state in self._transition_sets.get(from_state, _EMPTY_TRANSITIONS)
 
     def transition(
         self,
@@ -342,31 +473,43 @@ class FSMEngine:
 
     def get_allowed_transitions(self) -> List[str]:
         """获取当前状态允许的转换目标"""
-        return self.transitions.get(self.current_state, [])
+        return list(self.transitions.get(self.current_state, ()))
 
     def get_history(self) -> List[Dict[str, Any]]:
-        """获取状态转换历史"""
-        return [
-            {
+        """获取状态转换历史（记录只序列化一次，返回副本）"""
+        history = self.history
+        records = self._history_records
+        history_dicts = self._history_dicts
+
+        # 从首个与缓存记录不一致的位置起重新序列化（整体替换、原地替换、出栈后追加）
+        valid = 0
+        limit = min(len(records), len(history))
+        while valid < limit and records[valid] is history[valid]:
+            valid += 1
+        del records[valid:]
+        del history_dicts[valid:]
+
+        for record in history[valid:]:
+            records.append(record)
+            history_dicts.append({
                 "from_state": record.from_state,
                 "to_state": record.to_state,
                 "trigger": record.trigger,
-                "timestamp": record.timestamp,
+                "timestamp": record.get_timestamp(),
                 "context": record.context,
-            }
-            for record in self.history
-        ]
+            })
+        return [dict(item) for item in history_dicts]
 
     def is_terminal(self) -> bool:
         """检查是否处于终态"""
         state_def = self.get_current_definition()
         if state_def:
             return state_def.is_terminal
-        return self.current_state == FSMStateEnum.COMPLETED.value
+        return self.current_state == _S_COMPLETED
 
     def reset(self):
         """重置 FSM 到初始状态"""
-        self.current_state = FSMStateEnum.INIT.value
+        self.current_state = _S_INIT
         self.history = []
 
     def get_progress(self) -> Dict[str, Any]:
@@ -376,31 +519,17 @@ class FSMEngine:
         Returns:
             包含进度信息的字典
         """
-        # 定义状态顺序
-        state_order = [
-            FSMStateEnum.INIT.value,
-            FSMStateEnum.P1_RISK_ASSESS.value,
-            FSMStateEnum.P2_IMMEDIATE_CONTROL.value,
-            FSMStateEnum.P3_RESOURCE_DISPATCH.value,
-            FSMStateEnum.P4_AREA_ISOLATION.value,
-            FSMStateEnum.P5_CLEANUP.value,
-            FSMStateEnum.P6_VERIFICATION.value,
-            FSMStateEnum.P7_RECOVERY.value,
-            FSMStateEnum.P8_CLOSE.value,
-            FSMStateEnum.COMPLETED.value,
-        ]
-
-        current_index = state_order.index(self.current_state) if self.current_state in state_order else 0
-        total = len(state_order) - 1  # 不包括 INIT
+        current_index = _STATE_INDEX.get(self.current_state, 0)
+        total = len(_STATE_ORDER) - 1  # 不包括 INIT
 
         # 计算进度百分比
         progress_percent = (current_index / total) * 100 if total > 0 else 0
 
+        state_def = self.state_definitions.get(self.current_state)
+
         return {
             "current_state": self.current_state,
-            "current_state_name": self.state_definitions.get(
-                self.current_state, StateDefinition(id=self.current_state, name=self.current_state)
-            ).name,
+            "current_state_name": state_def.name if state_def is not None else self.current_state,
             "progress_percent": round(progress_percent, 1),
             "steps_completed": current_index,
             "total_steps": total,
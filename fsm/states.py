@@ -4,7 +4,9 @@ FSM 状态定义
 定义 FSM 的状态、转换和相关数据结构。
 支持从 YAML 配置文件加载状态定义。
 """
-from typing import Optional, List, Dict, Any, Callable
+import time
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Callable, FrozenSet, Mapping, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -24,28 +26,26 @@ class FSMStateEnum(str, Enum):
     COMPLETED = "COMPLETED"                    # 完成
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StateDefinition:
-    """状态定义"""
+    """状态定义（不可变，可在引擎实例间共享）"""
     id: str
     name: str
     description: str = ""
-    preconditions: List[str] = field(default_factory=list)
-    triggers: List[Dict[str, Any]] = field(default_factory=list)
+    preconditions: Tuple[str, ...] = ()
+    triggers: Tuple[Dict[str, Any], ...] = ()
     is_terminal: bool = False
 
     def __post_init__(self):
-        if self.preconditions is None:
-            self.preconditions = []
-        if self.triggers is None:
-            self.triggers = []
+        object.__setattr__(self, 'preconditions', tuple(self.preconditions or ()))
+        object.__setattr__(self, 'triggers', tuple(self.triggers or ()))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TransitionRule:
     """状态转换规则"""
     from_state: str
-    to_states: List[str]
+    to_states: Tuple[str, ...]
     condition: Optional[Callable[[Dict[str, Any]], bool]] = None
     priority: int = 0  # 优先级，数字越大优先级越高
 
@@ -56,7 +56,7 @@ class TransitionRule:
         return bool(self.condition(context))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Precondition:
     """前置条件"""
     name: str
@@ -94,7 +94,58 @@ class Precondition:
         return True
 
 
-@dataclass
+def _match_expected(actual: Any, expected_value: Any) -> bool:
+    """判断状态中的实际值是否满足强制动作的触发条件"""
+    if isinstance(expected_value, dict):
+        contains_any = expected_value.get("contains_any")
+        if contains_any is not None:
+            if actual is None:
+                return False
+            if isinstance(actual, (list, tuple, set)):
+                haystack = " ".join(str(item) for item in actual)
+            else:
+                haystack = str(actual)
+            return any(str(item) in haystack for item in contains_any)
+        contains = expected_value.get("contains")
+        if contains is not None:
+            if actual is None:
+                return False
+            return str(contains) in str(actual)
+    if expected_value == "not_empty":
+        return bool(actual)
+    if expected_value == "empty":
+        return not actual
+    if isinstance(expected_value, (list, tuple, set)):
+        return actual in expected_value
+    return bool(actual == expected_value)
+
+
+# 条件键前缀 -> Agent 状态中的子字典
+_CONDITION_SECTIONS: Mapping[str, str] = MappingProxyType({
+    "incident": "incident",
+    "risk": "risk_assessment",
+    "mandatory": "mandatory_actions_done",
+    "checklist": "checklist",
+    "spatial": "spatial_analysis",
+})
+
+
+def _compile_resolver(condition_key: str) -> Callable[[Dict[str, Any]], Any]:
+    """将条件键（如 risk_level、incident.fluid_type）预编译为从 Agent 状态取值的函数"""
+    if condition_key == "risk_level":
+        return lambda state: state.get("risk_assessment", {}).get("level")
+    if condition_key == "affected_runways":
+        return lambda state: state.get("spatial_analysis", {}).get("affected_runways", [])
+
+    prefix, sep, field_name = condition_key.partition(".")
+    section = _CONDITION_SECTIONS.get(prefix) if sep else None
+    if section is not None:
+        return lambda state: state.get(section, {}).get(field_name)
+
+    return lambda state: state.get(condition_key)
+
+
+@dataclass(frozen=True, slots=True)
 class MandatoryAction:
     """强制动作定义"""
     name: str
@@ -103,57 +154,21 @@ class MandatoryAction:
     params: Dict[str, Any] = field(default_factory=dict)
     check_field: str = ""  # 检查字段
     error_message: str = ""
+    # (取值函数, 期望值)，构造时由 condition 预编译
+    _resolvers: Tuple[Tuple[Callable[[Dict[str, Any]], Any], Any], ...] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        object.__setattr__(self, '_resolvers', tuple(
+            (_compile_resolver(key), expected)
+            for key, expected in (self.condition or {}).items()
+        ))
 
     def is_triggered(self, state: Dict[str, Any]) -> bool:
         """检查是否触发此强制动作"""
-        def match_expected(actual: Any, expected_value: Any) -> bool:
-            if isinstance(expected_value, dict):
-                contains_any = expected_value.get("contains_any")
-                if contains_any is not None:
-                    if actual is None:
-                        return False
-                    if isinstance(actual, (list, tuple, set)):
-                        haystack = " ".join(str(item) for item in actual)
-                    else:
-                        haystack = str(actual)
-                    return any(str(item) in haystack for item in contains_any)
-                contains = expected_value.get("contains")
-                if contains is not None:
-                    if actual is None:
-                        return False
-                    return str(contains) in str(actual)
-            if expected_value == "not_empty":
-                return bool(actual)
-            if expected_value == "empty":
-                return not actual
-            if isinstance(expected_value, (list, tuple, set)):
-                return actual in expected_value
-            return bool(actual == expected_value)
-
-        def resolve_value(condition_key: str) -> Any:
-            if condition_key == "risk_level":
-                return state.get("risk_assessment", {}).get("level")
-            if condition_key == "affected_runways":
-                return state.get("spatial_analysis", {}).get("affected_runways", [])
-
-            if "." in condition_key:
-                prefix, field = condition_key.split(".", 1)
-                if prefix == "incident":
-                    return state.get("incident", {}).get(field)
-                if prefix == "risk":
-                    return state.get("risk_assessment", {}).get(field)
-                if prefix == "mandatory":
-                    return state.get("mandatory_actions_done", {}).get(field)
-                if prefix == "checklist":
-                    return state.get("checklist", {}).get(field)
-                if prefix == "spatial":
-                    return state.get("spatial_analysis", {}).get(field)
-
-            return state.get(condition_key)
-
-        for key, expected in self.condition.items():
-            actual = resolve_value(key)
-            if not match_expected(actual, expected):
+        for resolve, expected in self._resolvers:
+            if not _match_expected(resolve(state), expected):
                 return False
         return True
 
@@ -163,17 +178,25 @@ class MandatoryAction:
         return bool(mandatory.get(self.check_field, False))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FSMTransitionRecord:
     """FSM 状态转换记录"""
     from_state: str
     to_state: str
     trigger: str
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    # 显式指定的 ISO 时间（如从会话历史恢复）；为 None 时由 created_at 按需格式化
+    timestamp: Optional[str] = None
     context: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time, repr=False, compare=False)
 
+    def get_timestamp(self) -> str:
+        """获取 ISO 格式时间戳（仅在读取时格式化）"""
+        if self.timestamp is not None:
+            return self.timestamp
+        return datetime.fromtimestamp(self.created_at).isoformat()
 
-@dataclass
+
+@dataclass(slots=True)
 class FSMValidationResult:
     """FSM 验证结果"""
     is_valid: bool
@@ -197,8 +220,8 @@ class FSMValidationResult:
         })
 
 
-# 默认状态定义（漏油场景）
-DEFAULT_STATE_DEFINITIONS = {
+# 默认状态定义（漏油场景），只读映射，引擎实例直接共享
+DEFAULT_STATE_DEFINITIONS: Mapping[str, StateDefinition] = MappingProxyType({
     FSMStateEnum.INIT.value: StateDefinition(
         id=FSMStateEnum.INIT.value,
         name="初始状态",
@@ -208,18 +231,18 @@ DEFAULT_STATE_DEFINITIONS = {
         id=FSMStateEnum.P1_RISK_ASSESS.value,
         name="风险评估",
         description="收集关键信息并评估风险等级",
-        preconditions=["checklist.fluid_type", "checklist.position"]
+        preconditions=("checklist.fluid_type", "checklist.position")
     ),
     FSMStateEnum.P2_IMMEDIATE_CONTROL.value: StateDefinition(
         id=FSMStateEnum.P2_IMMEDIATE_CONTROL.value,
         name="立即控制",
         description="高风险情况下的立即控制措施",
-        preconditions=["mandatory.risk_assessed"],
-        triggers=[{
+        preconditions=("mandatory.risk_assessed",),
+        triggers=({
             "condition": {"risk_level": ["R3", "R4"]},
             "action": "notify_department",
             "params": {"department": "消防", "priority": "immediate"}
-        }]
+        },)
     ),
     FSMStateEnum.P3_RESOURCE_DISPATCH.value: StateDefinition(
         id=FSMStateEnum.P3_RESOURCE_DISPATCH.value,
@@ -230,7 +253,7 @@ DEFAULT_STATE_DEFINITIONS = {
         id=FSMStateEnum.P4_AREA_ISOLATION.value,
         name="区域隔离",
         description="隔离受影响区域",
-        preconditions=["mandatory.risk_assessed"]
+        preconditions=("mandatory.risk_assessed",)
     ),
     FSMStateEnum.P5_CLEANUP.value: StateDefinition(
         id=FSMStateEnum.P5_CLEANUP.value,
@@ -251,7 +274,7 @@ DEFAULT_STATE_DEFINITIONS = {
         id=FSMStateEnum.P8_CLOSE.value,
         name="关闭与报告",
         description="关闭事件并生成报告",
-        preconditions=["checklist.p1_complete", "mandatory.risk_assessed"]
+        preconditions=("checklist.p1_complete", "mandatory.risk_assessed")
     ),
     FSMStateEnum.COMPLETED.value: StateDefinition(
         id=FSMStateEnum.COMPLETED.value,
@@ -259,29 +282,34 @@ DEFAULT_STATE_DEFINITIONS = {
         description="事件处理完成",
         is_terminal=True
     ),
-}
+})
 
-# 默认转换规则
-DEFAULT_TRANSITIONS = {
-    FSMStateEnum.INIT.value: [FSMStateEnum.P1_RISK_ASSESS.value],
-    FSMStateEnum.P1_RISK_ASSESS.value: [
+# 默认转换规则（只读）
+DEFAULT_TRANSITIONS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    FSMStateEnum.INIT.value: (FSMStateEnum.P1_RISK_ASSESS.value,),
+    FSMStateEnum.P1_RISK_ASSESS.value: (
         FSMStateEnum.P2_IMMEDIATE_CONTROL.value,
         FSMStateEnum.P4_AREA_ISOLATION.value
-    ],
-    FSMStateEnum.P2_IMMEDIATE_CONTROL.value: [FSMStateEnum.P3_RESOURCE_DISPATCH.value],
-    FSMStateEnum.P3_RESOURCE_DISPATCH.value: [FSMStateEnum.P4_AREA_ISOLATION.value],
-    FSMStateEnum.P4_AREA_ISOLATION.value: [FSMStateEnum.P5_CLEANUP.value],
-    FSMStateEnum.P5_CLEANUP.value: [FSMStateEnum.P6_VERIFICATION.value],
-    FSMStateEnum.P6_VERIFICATION.value: [
+    ),
+    FSMStateEnum.P2_IMMEDIATE_CONTROL.value: (FSMStateEnum.P3_RESOURCE_DISPATCH.value,),
+    FSMStateEnum.P3_RESOURCE_DISPATCH.value: (FSMStateEnum.P4_AREA_ISOLATION.value,),
+    FSMStateEnum.P4_AREA_ISOLATION.value: (FSMStateEnum.P5_CLEANUP.value,),
+    FSMStateEnum.P5_CLEANUP.value: (FSMStateEnum.P6_VERIFICATION.value,),
+    FSMStateEnum.P6_VERIFICATION.value: (
         FSMStateEnum.P7_RECOVERY.value,
         FSMStateEnum.P5_CLEANUP.value  # 可能需要重新清污
-    ],
-    FSMStateEnum.P7_RECOVERY.value: [FSMStateEnum.P8_CLOSE.value],
-    FSMStateEnum.P8_CLOSE.value: [FSMStateEnum.COMPLETED.value],
-}
+    ),
+    FSMStateEnum.P7_RECOVERY.value: (FSMStateEnum.P8_CLOSE.value,),
+    FSMStateEnum.P8_CLOSE.value: (FSMStateEnum.COMPLETED.value,),
+})
+
+# 转换目标集合（供合法性判断 O(1) 查找），与 DEFAULT_TRANSITIONS 一一对应
+DEFAULT_TRANSITION_SETS: Mapping[str, FrozenSet[str]] = MappingProxyType({
+    from_state: frozenset(to_states) for from_state, to_states in DEFAULT_TRANSITIONS.items()
+})
 
 # 默认强制动作
-DEFAULT_MANDATORY_ACTIONS = [
+DEFAULT_MANDATORY_ACTIONS: Tuple[MandatoryAction, ...] = (
     MandatoryAction(
         name="high_risk_fire_notification",
         condition={"risk_level": ["R3", "R4"]},
@@ -306,4 +334,4 @@ DEFAULT_MANDATORY_ACTIONS = [
         check_field="atc_notified",
         error_message="影响跑道运行必须通知塔台"
     ),
-]
+)
@@ -294,12 +294,8 @@ class FSMValidator:
             from constraints.loader import get_loader
             return get_loader().get_all_p1_keys(scenario_type)
         except Exception as exc:
-            logger.warning(
-                "Failed to load P1 fields for scenario %s: %s",
-                scenario_type,
-                exc,
-                exc_info=True,
-            )
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Failed to load P1 fields for scenario %s: %r", scenario_type, exc)
             return ["fluid_type", "continuous", "engine_status", "position"]
 
     def _get_p1_fields_with_labels(self, agent_state: Dict[str, Any]) -> Tuple[List[str], Dict[str, str]]:
@@ -313,12 +309,8 @@ class FSMValidator:
             labels = {f.key: f.label for f in constraints.p1_fields}
             return p1_fields, labels
         except Exception as exc:
-            logger.warning(
-                "Failed to load P1 field labels for scenario %s: %s",
-                scenario_type,
-                exc,
-                exc_info=True,
-            )
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Failed to load P1 field labels for scenario %s: %r", scenario_type, exc)
             return ["fluid_type", "continuous", "engine_status", "position"], {}
 
     def generate_validation_report(
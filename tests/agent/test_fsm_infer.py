@@ -14,3 +14,175 @@ def test_fsm_infer_p1_risk_assess():
         "risk_assessment": {},
     }
     assert engine.infer_state(state) == FSMStateEnum.P1_RISK_ASSESS.value
+
+
+def test_fsm_yaml_cache_reuses_parse_until_file_changes(tmp_path):
+    import os
+
+    from fsm import engine as engine_module
+
+    config = tmp_path / "fsm_states.yaml"
+    config.write_text("fsm_states:\n  - id: INIT\n    name: 开始\n", encoding="utf-8")
+    first = engine_module._load_yaml_cached(config)
+    assert engine_module._load_yaml_cached(config) is first
+    assert FSMEngine(config_path=str(config)).state_definitions["INIT"].name == "开始"
+
+    config.write_text("fsm_states:\n  - id: INIT\n    name: 初始化\n", encoding="utf-8")
+    stat = config.stat()
+    os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert engine_module._load_yaml_cached(config) is not first
+    assert FSMEngine(config_path=str(config)).state_definitions["INIT"].name == "初始化"
+    # 文件变更后替换原缓存项，而不是按 mtime 累积新条目
+    assert len([key for key in engine_module._YAML_CACHE if str(tmp_path) in key]) == 1
+
+
+def test_fsm_p1_fields_cached_per_scenario(monkeypatch):
+    import constraints.loader as loader_module
+
+    calls = []
+    real_loader = loader_module.get_loader()
+
+    class CountingLoader:
+        def get_all_p1_keys(self, scenario_type):
+            calls.append(scenario_type)
+            return real_loader.get_all_p1_keys(scenario_type)
+
+    monkeypatch.setattr(loader_module, "get_loader", lambda: CountingLoader())
+    engine = FSMEngine(scenario_type="oil_spill")
+    state = {"scenario_type": "oil_spill", "checklist": {}}
+    for _ in range(3):
+        engine.infer_state(state)
+    assert calls == ["oil_spill"]
+    assert engine._get_p1_fields(state) == tuple(real_loader.get_all_p1_keys("oil_spill"))
+
+
+def test_fsm_infer_risk_branches():
+    engine = FSMEngine(scenario_type="oil_spill")
+    base = {"scenario_type": "oil_spill", "checklist": {"fluid_type": True, "position": True}}
+
+    high = {
+        **base,
+        "mandatory_actions_done": {"risk_assessed": True},
+        "risk_assessment": {"level": "R3"},
+    }
+    assert engine.infer_state(high) == FSMStateEnum.P2_IMMEDIATE_CONTROL.value
+
+    high["mandatory_actions_done"]["fire_dept_notified"] = True
+    assert engine.infer_state(high) == FSMStateEnum.P3_RESOURCE_DISPATCH.value
+
+    low = {
+        **base,
+        "mandatory_actions_done": {"risk_assessed": True},
+        "risk_assessment": {"level": "R1"},
+    }
+    assert engine.infer_state(low) == FSMStateEnum.P4_AREA_ISOLATION.value
+
+    assert (
+        engine.infer_state({**low, "final_report": {"summary": "ok"}})
+        == FSMStateEnum.COMPLETED.value
+    )
+    assert (
+        engine.infer_state({"scenario_type": "oil_spill", "checklist": {}})
+        == FSMStateEnum.INIT.value
+    )
+
+
+def test_fsm_progress_uses_state_order():
+    engine = FSMEngine(scenario_type="oil_spill")
+    engine.current_state = FSMStateEnum.P4_AREA_ISOLATION.value
+    progress = engine.get_progress()
+    assert progress["steps_completed"] == 4
+    assert progress["total_steps"] == 9
+    assert progress["progress_percent"] == 44.4
+    assert progress["current_state_name"] == engine.state_definitions[engine.current_state].name
+
+    engine.current_state = "CUSTOM_STATE"
+    progress = engine.get_progress()
+    assert progress["steps_completed"] == 0
+    assert progress["current_state_name"] == "CUSTOM_STATE"
+
+
+def test_fsm_history_serialization_tracks_changes():
+    from fsm.states import FSMTransitionRecord
+
+    engine = FSMEngine(scenario_type="oil_spill")
+    assert engine.get_history() == []
+
+    engine.transition(FSMStateEnum.P1_RISK_ASSESS.value, "t1")
+    first = engine.get_history()
+    assert [item["to_state"] for item in first] == [FSMStateEnum.P1_RISK_ASSESS.value]
+
+    engine.transition(FSMStateEnum.P2_IMMEDIATE_CONTROL.value, "t2", {"k": 1})
+    second = engine.get_history()
+    assert second[0] == first[0]
+    assert second[1]["trigger"] == "t2" and second[1]["context"] == {"k": 1}
+
+    # 返回副本，调用方修改不影响后续结果
+    second[0]["trigger"] = "tampered"
+    assert engine.get_history()[0]["trigger"] == "t1"
+
+    # 长度不变的出栈后追加、原地替换均重新序列化
+    engine.history.pop()
+    engine.history.append(FSMTransitionRecord(from_state="A", to_state="B", trigger="t3"))
+    assert [item["trigger"] for item in engine.get_history()] == ["t1", "t3"]
+    engine.history[0] = FSMTransitionRecord(from_state="A", to_state="B", trigger="t0")
+    assert [item["trigger"] for item in engine.get_history()] == ["t0", "t3"]
+
+    engine.history = [FSMTransitionRecord(from_state="A", to_state="B", trigger="restore")]
+    assert [item["trigger"] for item in engine.get_history()] == ["restore"]
+
+    engine.reset()
+    assert engine.get_history() == []
+
+
+def test_fsm_infer_states_batch_matches_single():
+    engine = FSMEngine(scenario_type="oil_spill")
+    states = [
+        {"scenario_type": "oil_spill", "checklist": {}},
+        {"scenario_type": "oil_spill", "checklist": {"fluid_type": True, "position": True}},
+        {
+            "scenario_type": "oil_spill",
+            "checklist": {"fluid_type": True, "position": True},
+            "mandatory_actions_done": {"risk_assessed": True},
+            "risk_assessment": {"level": "R4"},
+        },
+        {"final_report": {"summary": "done"}},
+    ]
+    assert engine.infer_states_batch(states) == [engine.infer_state(s) for s in states]
+    assert engine.infer_states_batch([]) == []
+
+
+def test_fsm_transition_record_timestamp_formatted_on_read():
+    from datetime import datetime
+
+    from fsm.states import FSMTransitionRecord
+
+    record = FSMTransitionRecord(from_state="INIT", to_state="P1_RISK_ASSESS", trigger="t")
+    assert record.timestamp is None
+    assert (
+        abs(datetime.fromisoformat(record.get_timestamp()).timestamp() - record.created_at) < 1e-5
+    )
+
+    restored = FSMTransitionRecord(
+        from_state="INIT", to_state="P1_RISK_ASSESS", trigger="t", timestamp="2024-01-01T00:00:00"
+    )
+    assert restored.get_timestamp() == "2024-01-01T00:00:00"
+
+
+def test_fsm_yaml_definitions_do_not_alias_cached_config(tmp_path):
+    config = tmp_path / "fsm_states.yaml"
+    config.write_text(
+        "fsm_states:\n"
+        "  - id: INIT\n"
+        "    name: 开始\n"
+        "    preconditions: [checklist.position]\n"
+        "    triggers:\n"
+        "      - action: notify_department\n",
+        encoding="utf-8",
+    )
+    first = FSMEngine(config_path=str(config)).state_definitions["INIT"]
+    assert first.preconditions == ("checklist.position",)
+    first.triggers[0]["action"] = "changed"
+
+    second = FSMEngine(config_path=str(config)).state_definitions["INIT"]
+    assert second.triggers[0]["action"] == "notify_department"
@@ -0,0 +1,185 @@
+"""
+终端运行器辅助函数测试
+
+测试覆盖:
+- 用户回答分类（跳过/字段关键词）
+- 最近 assistant 消息缓存
+"""
+
+from apps.run_agent import AgentRunner, is_skip_or_unknown
+
+
+def test_skip_or_unknown_detection():
+    assert is_skip_or_unknown("这个暂不确定")
+    assert is_skip_or_unknown("Skip")
+    assert not is_skip_or_unknown("发动机已关车")
+
+
+def test_parse_pending_field_value_keywords():
+    runner = AgentRunner()
+    assert runner._parse_pending_field_value("已经关车了", "engine_status") == "STOPPED"
+    assert runner._parse_pending_field_value("还在运转", "engine_status") == "RUNNING"
+    assert runner._parse_pending_field_value("还在持续滴漏", "continuous") is True
+    assert runner._parse_pending_field_value("不持续", "continuous") is False
+    assert runner._parse_pending_field_value("液压油", "fluid_type") == "HYDRAULIC"
+    assert runner._parse_pending_field_value("面积很大", "leak_size") == "LARGE"
+    assert runner._parse_pending_field_value("在 12 滑行道", "position") == "12"
+
+
+def test_latest_assistant_message_cache_tracks_appends():
+    runner = AgentRunner()
+    messages = [
+        {"role": "user", "content": "报告漏油"},
+        {"role": "assistant", "content": "具体位置？"},
+    ]
+    runner.state = {"messages": messages}
+    assert runner._get_latest_assistant_message() == "具体位置？"
+
+    messages.append({"role": "user", "content": "501机位"})
+    assert runner._get_latest_assistant_message() == "具体位置？"
+
+    messages.append({"role": "assistant", "content": "发动机状态？"})
+    assert runner._get_latest_assistant_message() == "发动机状态？"
+
+    # 节点整体替换消息列表时重新扫描
+    runner.state["messages"] = [{"role": "assistant", "content": "新的问题"}]
+    assert runner._get_latest_assistant_message() == "新的问题"
+
+
+def test_is_waiting_answer_follows_final_answer_changes():
+    runner = AgentRunner()
+    runner.state = {"final_answer": "等待用户回复位置信息"}
+    assert runner._is_waiting_answer()
+    assert runner._is_waiting_answer()
+
+    runner.state["final_answer"] = "# 处置报告"
+    assert not runner._is_waiting_answer()
+
+    runner.state["final_answer"] = ""
+    assert not runner._is_waiting_answer()
+
+
+def test_full_width_input_is_nfkc_normalized():
+    from apps.run_agent import parse_simple_yes_no
+
+    runner = AgentRunner()
+    assert parse_simple_yes_no("ＹＥＳ") is True
+    assert runner._parse_pending_field_value("１２滑行道", "position") == "12"
+    assert runner._parse_pending_field_value("大概５㎡", "leak_size") == "LARGE"
+
+
+def test_print_info_lines_matches_print_info(capsys):
+    from apps.run_agent import print_info, print_info_lines
+
+    print_info("风险: 高")
+    print_info("  隔离区域: 3 个节点")
+    expected = capsys.readouterr().out
+
+    print_info_lines(["风险: 高", "  隔离区域: 3 个节点"])
+    assert capsys.readouterr().out == expected
+
+    print_info_lines([])
+    assert capsys.readouterr().out == ""
+
+
+def test_save_report_fallback_writes_markdown_and_json(tmp_path, monkeypatch):
+    import json
+
+    import apps.run_agent as run_agent
+
+    monkeypatch.setattr(run_agent, "_REPORTS_ROOT", tmp_path / "outputs" / "reports")
+    monkeypatch.setattr(run_agent.settings, "DEBUG", False)
+    state = {
+        "session_id": "s-1",
+        "scenario_type": "oil_spill",
+        "incident": {"flight_no": "CA1234", "position": "501"},
+        "checklist": {"p1_position": True},
+    }
+    report = {
+        "event_summary": "501机位漏油",
+        "risk_level": "HIGH",
+        "handling_process": ["通知消防"],
+        "recommendations": ["封闭机位"],
+    }
+
+    md_path = run_agent.save_report(state, report)
+
+    content = open(md_path, encoding="utf-8").read()
+    assert content.startswith("# 机坪特情处置检查单\n\n**会话ID**: s-1\n")
+    assert "## 风险等级: HIGH\n\n" in content
+    assert "- 通知消防\n" in content
+    assert content.endswith("1. 封闭机位\n\n")
+
+    json_files = list((tmp_path / "outputs" / "reports" / "oil_spill").glob("data_[0-9]*.json"))
+    assert len(json_files) == 1
+    raw = json_files[0].read_text(encoding="utf-8")
+    assert "\n" not in raw
+    data = json.loads(raw)
+    assert data["session_id"] == "s-1"
+    assert data["incident"]["flight_no"] == "CA1234"
+
+
+def test_save_report_debug_writes_pretty_json(tmp_path, monkeypatch):
+    import json
+
+    import apps.run_agent as run_agent
+
+    monkeypatch.setattr(run_agent, "_REPORTS_ROOT", tmp_path / "outputs" / "reports")
+    monkeypatch.setattr(run_agent.settings, "DEBUG", True)
+    run_agent.save_report({"session_id": "s-2", "incident": {}}, {}, answer="# 报告")
+
+    reports_dir = tmp_path / "outputs" / "reports" / "oil_spill"
+    compact = list(reports_dir.glob("data_[0-9]*.json"))
+    pretty = list(reports_dir.glob("data_pretty_*.json"))
+    assert len(compact) == 1 and len(pretty) == 1
+    assert json.loads(compact[0].read_text(encoding="utf-8")) == json.loads(
+        pretty[0].read_text(encoding="utf-8")
+    )
+    assert pretty[0].read_text(encoding="utf-8").startswith('{\n  "session_id"')
+
+
+def test_is_confirm_end_reply_variants():
+    from apps.run_agent import is_confirm_end
+
+    assert is_confirm_end("yes")
+    assert is_confirm_end("完毕")
+    assert is_confirm_end("没有其他问题了")
+    assert is_confirm_end("无信息补充")
+    assert not is_confirm_end("还有一个情况")
+    assert not is_confirm_end("501机位也有油迹")
+
+
+def test_save_report_skips_json_sidecar_for_llm_answer(tmp_path, monkeypatch):
+    import apps.run_agent as run_agent
+
+    monkeypatch.setattr(run_agent, "_REPORTS_ROOT", tmp_path / "outputs" / "reports")
+    monkeypatch.setattr(run_agent.settings, "DEBUG", False)
+    monkeypatch.setattr(run_agent.settings, "SAVE_JSON_SIDECAR", False)
+
+    md_path = run_agent.save_report({"session_id": "s-3", "incident": {}}, {}, answer="# 报告")
+
+    reports_dir = tmp_path / "outputs" / "reports" / "oil_spill"
+    assert open(md_path, encoding="utf-8").read() == "# 报告"
+    assert not list(reports_dir.glob("data_*.json"))
+
+    monkeypatch.setattr(run_agent.settings, "SAVE_JSON_SIDECAR", True)
+    run_agent.save_report({"session_id": "s-3", "incident": {}}, {}, answer="# 报告")
+    assert len(list(reports_dir.glob("data_[0-9]*.json"))) == 1
+
+
+def test_quiet_mode_still_resolves_flight_plan(capsys):
+    class FakeFlightPlanTool:
+        def execute(self, incident, params):
+            return {"flight_plan_table": f"table:{params['flight_no']}"}
+
+    runner = AgentRunner()
+    runner._verbose = False
+    runner._flight_plan_tool = FakeFlightPlanTool()
+    runner.state = {}
+
+    runner._display_node_result("input_parser", {"incident": {"flight_no": "CA1234"}})
+
+    assert runner.state["flight_plan_table"] == "table:CA1234"
+    assert runner.state["flight_plan_checked"] is True
+    assert runner.state["_flight_plan_displayed"] is True
+    assert capsys.readouterr().out == ""
@@ -6,9 +6,12 @@
 - 限额状态查询
 - 过期记录清理
 """
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
-from datetime import datetime, timedelta
 from fastapi import HTTPException
 
 from apps.api.rate_limit import (
@@ -19,6 +22,15 @@ from apps.api.rate_limit import (
 )
 
 
+@contextmanager
+def _limit_config(enabled: bool, limit: int = 100):
+    """覆盖模块级的速率限制配置"""
+    with patch("apps.api.rate_limit._RL_ENABLED", enabled), patch(
+        "apps.api.rate_limit._RL_LIMIT", limit
+    ):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def clear_rate_limit_state():
     """每个测试前清理速率限制状态"""
@@ -33,8 +45,7 @@ class TestRateLimitCheck:
     @pytest.mark.asyncio
     async def test_rate_limit_disabled(self):
         """测试速率限制禁用时直接通过"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = False
+        with _limit_config(enabled=False):
 
             request = MagicMock()
             result = await rate_limit_check(request)
@@ -43,9 +54,7 @@ class TestRateLimitCheck:
     @pytest.mark.asyncio
     async def test_first_request_passes(self):
         """测试首次请求通过"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 100
+        with _limit_config(enabled=True, limit=100):
 
             request = MagicMock()
             request.headers.get = lambda key: None
@@ -57,9 +66,7 @@ class TestRateLimitCheck:
     @pytest.mark.asyncio
     async def test_requests_within_limit(self):
         """测试限制范围内的请求通过"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 5
+        with _limit_config(enabled=True, limit=5):
 
             request = MagicMock()
             request.headers.get = lambda key: None
@@ -73,9 +80,7 @@ class TestRateLimitCheck:
     @pytest.mark.asyncio
     async def test_rate_limit_exceeded(self):
         """测试超过限制抛出异常"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 3
+        with _limit_config(enabled=True, limit=3):
 
             request = MagicMock()
             request.headers.get = lambda key: None
@@ -94,9 +99,7 @@ class TestRateLimitCheck:
     @pytest.mark.asyncio
     async def test_rate_limit_by_api_key(self):
         """测试按 API Key 限制"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 2
+        with _limit_config(enabled=True, limit=2):
 
             # 请求1: API Key A
             request_a = MagicMock()
@@ -123,9 +126,7 @@ class TestRateLimitCheck:
     @pytest.mark.asyncio
     async def test_rate_limit_by_ip(self):
         """测试按 IP 限制（无 API Key 时）"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 2
+        with _limit_config(enabled=True, limit=2):
 
             # 请求来自 IP1
             request_ip1 = MagicMock()
@@ -156,8 +157,7 @@ class TestGetRateLimitStatus:
     @pytest.mark.asyncio
     async def test_status_when_disabled(self):
         """测试禁用时的状态"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = False
+        with _limit_config(enabled=False):
 
             request = MagicMock()
             status = await get_rate_limit_status(request)
@@ -166,9 +166,7 @@ class TestGetRateLimitStatus:
     @pytest.mark.asyncio
     async def test_status_full_remaining(self):
         """测试完整剩余量"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 100
+        with _limit_config(enabled=True, limit=100):
 
             request = MagicMock()
             request.headers.get = lambda key: None
@@ -183,9 +181,7 @@ class TestGetRateLimitStatus:
     @pytest.mark.asyncio
     async def test_status_after_requests(self):
         """测试发送请求后的状态"""
-        with patch("apps.api.rate_limit.settings") as mock_settings:
-            mock_settings.RATE_LIMIT_ENABLED = True
-            mock_settings.RATE_LIMIT_REQUESTS = 10
+        with _limit_config(enabled=True, limit=10):
 
             request = MagicMock()
             request.headers.get = lambda key: None
@@ -210,9 +206,9 @@ class TestCleanupExpiredRecords:
     def test_cleanup_expired_clients(self):
         """测试清理过期客户端记录"""
         # 手动添加过期记录
-        old_time = datetime.now() - timedelta(minutes=2)
-        _request_counts["ip:old-client"] = [old_time]
-        _request_counts["ip:current-client"] = [datetime.now()]
+        old_time = time.monotonic() - 120
+        _request_counts["ip:old-client"] = deque([old_time])
+        _request_counts["ip:current-client"] = deque([time.monotonic()])
 
         cleaned = cleanup_expired_records()
         assert cleaned == 1
@@ -221,11 +217,11 @@ class TestCleanupExpiredRecords:
 
     def test_cleanup_partial_records(self):
         """测试部分记录过期的清理"""
-        now = datetime.now()
-        old_time = now - timedelta(minutes=2)
+        now = time.monotonic()
+        old_time = now - 120
 
         # 添加混合记录
-        _request_counts["ip:mixed-client"] = [old_time, old_time, now]
+        _request_counts["ip:mixed-client"] = deque([old_time, old_time, now])
 
         cleanup_expired_records()
 
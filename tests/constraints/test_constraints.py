@@ -98,6 +98,93 @@ class TestConstraintLoader:
         with pytest.raises(FileNotFoundError):
             loader.load('nonexistent_scenario')
 
+    def test_p1_keys_only_parse_checklist(self, loader):
+        """测试按需解析：只取 P1 key 时不解析 FSM 状态与强制动作配置"""
+        loader.get_all_p1_keys('oil_spill')
+        constraints = loader.load('oil_spill')
+
+        assert 'p1_fields' in vars(constraints)
+        assert 'state_constraints' not in vars(constraints)
+        assert 'mandatory_actions' not in vars(constraints)
+
+    def test_check_plan_orders_checks_and_is_cached(self, loader):
+        """测试检查计划：P1 字段、状态字段、强制动作、P2 字段依次排列并按状态缓存"""
+        from constraints.loader import CheckKind
+
+        constraints = loader.load('oil_spill')
+        plan = constraints.check_plan('P2_IMMEDIATE_CONTROL')
+        kinds = [kind for _, kind, _ in plan]
+
+        assert [key for key, kind, _ in plan if kind is CheckKind.P1_FIELD] == list(constraints.p1_keys)
+        assert kinds == sorted(kinds, key=[
+            CheckKind.P1_FIELD, CheckKind.STATE_FIELD, CheckKind.MANDATORY_ACTION, CheckKind.P2_FIELD,
+        ].index)
+        assert CheckKind.P2_FIELD not in kinds
+        assert constraints.check_plan('P2_IMMEDIATE_CONTROL') is plan
+
+        strict_plan = constraints.check_plan('P2_IMMEDIATE_CONTROL', strict_mode=True)
+        assert [key for key, kind, _ in strict_plan if kind is CheckKind.P2_FIELD] == list(constraints.p2_keys)
+
+    def test_preload_parses_all_scenarios(self, tmp_path, monkeypatch):
+        """测试预加载：解析全部场景配置并写入解析缓存"""
+        import shutil
+
+        import constraints.loader as loader_module
+
+        monkeypatch.setattr(loader_module, '_YAML_CACHE_DIR', tmp_path / 'cache')
+        shutil.copytree(project_root.parent / 'scenarios' / 'oil_spill', tmp_path / 'oil_spill')
+        (tmp_path / 'not_a_scenario').mkdir()
+
+        loader = ConstraintLoader(base_path=str(tmp_path))
+        assert loader.preload() == ['oil_spill']
+
+        constraints = loader.load('oil_spill')
+        assert {'p1_fields', 'p2_fields', 'state_constraints', 'mandatory_actions'} <= set(vars(constraints))
+        assert loader_module._yaml_cache_path(tmp_path / 'oil_spill' / 'checklist.yaml').exists()
+        # 缓存写在源码目录之外
+        assert not list((tmp_path / 'oil_spill').glob('*.yaml.*'))
+
+    def test_yaml_cache_refreshes_on_change(self, tmp_path, monkeypatch):
+        """测试 YAML 解析缓存：首次生成缓存，源文件变化后重新解析"""
+        import shutil
+
+        import constraints.loader as loader_module
+
+        monkeypatch.setattr(loader_module, '_YAML_CACHE_DIR', tmp_path / 'cache')
+        scenario_dir = tmp_path / 'oil_spill'
+        shutil.copytree(project_root.parent / 'scenarios' / 'oil_spill', scenario_dir)
+
+        first = ConstraintLoader(base_path=str(tmp_path)).load('oil_spill')
+        assert first.p1_fields
+        assert loader_module._yaml_cache_path(scenario_dir / 'checklist.yaml').exists()
+
+        cached = ConstraintLoader(base_path=str(tmp_path)).load('oil_spill')
+        assert [f.key for f in cached.p1_fields] == [f.key for f in first.p1_fields]
+
+        checklist_file = scenario_dir / 'checklist.yaml'
+        checklist_file.write_text(
+            "checklist:\n  p1_fields:\n    - key: position\n      label: 位置\n",
+            encoding='utf-8',
+        )
+        reloaded = ConstraintLoader(base_path=str(tmp_path)).load('oil_spill')
+        assert [f.key for f in reloaded.p1_fields] == ['position']
+
+    def test_corrupted_yaml_cache_falls_back_to_yaml(self, tmp_path, monkeypatch):
+        """测试 YAML 解析缓存损坏时重新解析源文件"""
+        import marshal
+
+        import constraints.loader as loader_module
+
+        monkeypatch.setattr(loader_module, '_YAML_CACHE_DIR', tmp_path / 'cache')
+        config = tmp_path / 'config.yaml'
+        config.write_text("scenario:\n  id: demo\n", encoding='utf-8')
+        cache_path = loader_module._yaml_cache_path(config)
+
+        for payload in (b'\x00garbage', marshal.dumps(12345), marshal.dumps(((1, 2),))):
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(payload)
+            assert loader_module._load_yaml(config) == {'scenario': {'id': 'demo'}}
+
 
 class TestConstraintChecker:
     """约束检查器测试"""
@@ -207,6 +294,30 @@ class TestConstraintChecker:
         ]
         assert len(action_errors) >= 1
 
+    def test_check_all_tracks_input_changes(self, checker, complete_p1_state):
+        """测试重复检查返回独立结果，动作变化后结果随之更新"""
+        first = checker.check_all(complete_p1_state)
+        second = checker.check_all(complete_p1_state)
+        assert first is not second
+        assert [v.code for v in first.errors] == [v.code for v in second.errors]
+
+        # 调用方修改返回结果不影响后续检查
+        first.violations.clear()
+        assert checker.check_all(complete_p1_state).errors == second.errors
+
+        complete_p1_state['mandatory_actions_done']['risk_assessed'] = True
+        updated = checker.check_all(complete_p1_state)
+        assert not any(v.field == 'risk_assessed' for v in updated.errors)
+
+    def test_sampling_rate_skips_check_all_but_not_phase_gate(self, partial_state):
+        """测试采样率为 0 时 check_all 直接通过，阶段转换门控仍完整检查"""
+        sampled = ConstraintChecker(sampling_rate=0.0)
+
+        assert sampled.check_all(partial_state).passed is True
+        allowed, reasons = sampled.can_proceed_to_next_phase(partial_state, 'P1_RISK_ASSESS')
+        assert allowed is False
+        assert reasons
+
     def test_strict_mode_warns_p2(self, checker, complete_p1_state):
         """测试严格模式下 P2 字段缺失给出警告"""
         result = checker.check_all(complete_p1_state, strict_mode=True)
@@ -215,6 +326,41 @@ class TestConstraintChecker:
         p2_warnings = [v for v in result.warnings if v.code == 'FIELD_MISSING']
         assert len(p2_warnings) >= 1
 
+    def test_scenario_without_fields_passes(self, tmp_path):
+        """测试未配置任何字段与动作的场景直接通过"""
+        scenario_dir = tmp_path / 'draft'
+        scenario_dir.mkdir()
+        (scenario_dir / 'checklist.yaml').write_text("checklist: {}\n", encoding='utf-8')
+
+        checker = ConstraintChecker(ConstraintLoader(base_path=str(tmp_path)))
+        result = checker.check_all({'scenario_type': 'draft', 'checklist': {}}, strict_mode=True)
+
+        assert result.passed
+        assert result.violations == [] and result.warnings == []
+
+    def test_mandatory_actions_reported_when_none_done(self, tmp_path):
+        """测试尚未执行任何动作时按配置顺序报告全部强制动作"""
+        scenario_dir = tmp_path / 'draft'
+        scenario_dir.mkdir()
+        (scenario_dir / 'checklist.yaml').write_text("checklist: {}\n", encoding='utf-8')
+        (scenario_dir / 'fsm_states.yaml').write_text(
+            "fsm_states:\n"
+            "  - id: P2_IMMEDIATE_CONTROL\n"
+            "    required_mandatory_actions:\n"
+            "      - risk_assessed\n"
+            "      - action: fire_dept_notified\n",
+            encoding='utf-8',
+        )
+
+        checker = ConstraintChecker(ConstraintLoader(base_path=str(tmp_path)))
+        state = {'scenario_type': 'draft', 'fsm_state': 'P2_IMMEDIATE_CONTROL'}
+
+        result = checker.check_all({**state, 'mandatory_actions_done': {}})
+        assert [v.field for v in result.errors] == ['risk_assessed', 'fire_dept_notified']
+
+        result = checker.check_all({**state, 'mandatory_actions_done': {'risk_assessed': True}})
+        assert [v.field for v in result.errors] == ['fire_dept_notified']
+
 
 class TestChecklistValidator:
     """Checklist 验证器测试"""
@@ -242,6 +388,39 @@ class TestChecklistValidator:
         assert is_valid is True
 
 
+    def test_checklist_field_precompiles_validation(self):
+        """测试 validation 正则在字段创建时预编译，无效正则被忽略"""
+        from constraints.loader import ChecklistField
+
+        valid = ChecklistField(
+            field='position', key='position', label='位置', field_type='string',
+            required=True, priority='P1', validation=r'^\d{3}$',
+        )
+        assert valid.validation_re is not None
+        assert valid.validation_re.match('501')
+
+        invalid = ChecklistField(
+            field='position', key='position', label='位置', field_type='string',
+            required=True, priority='P1', validation='([',
+        )
+        assert invalid.validation_re is None
+
+
+    def test_loaded_constraints_are_immutable(self):
+        """测试加载后的字段与状态约束不可变"""
+        import dataclasses
+
+        constraints = load_constraints('oil_spill')
+        field = constraints.p1_fields[0]
+        assert isinstance(constraints.p1_fields, tuple)
+        assert not hasattr(field, '__dict__')
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            field.key = 'other'
+
+        state_constraint = next(iter(constraints.state_constraints.values()))
+        assert isinstance(state_constraint.required_checklist_fields, tuple)
+
+
 class TestConstraintViolation:
     """约束违反详情测试"""
 
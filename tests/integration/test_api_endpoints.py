@@ -102,3 +102,82 @@ def test_get_event_status_missing_session(client):
     test_client, _store = client
     response = test_client.get("/event/missing-session")
     assert response.status_code == 404
+
+
+def test_get_event_report_returns_json(client):
+    test_client, store = client
+
+    report = {
+        "summary": "漏油处置完成",
+        "timeline": [{"step": 1, "action": "notify"}],
+        "risk": {"level": "R3", "score": 80},
+    }
+    asyncio.run(store.set("sess-3", {"final_report": report}, settings.SESSION_TTL_SECONDS))
+
+    response = test_client.get("/event/sess-3/report")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    assert response.json() == report
+
+
+def test_extract_stream_event_only_includes_node_fields():
+    state = {
+        "fsm_state": "P1_EVALUATION",
+        "checklist": {},
+        "current_thought": "thinking",
+        "current_action": "assess_risk",
+        "current_action_input": {"x": 1},
+        "risk_assessment": {"level": "R2"},
+        "final_answer": "",
+        "messages": [{"role": "assistant", "content": "q"}],
+    }
+
+    reasoning_event = api_main.extract_stream_event("reasoning", state)
+    assert reasoning_event["current_thought"] == "thinking"
+    assert reasoning_event["current_action_input"] == {"x": 1}
+    assert "risk_assessment" not in reasoning_event
+    assert reasoning_event["next_question"] == "q"
+
+    unknown_event = api_main.extract_stream_event("custom_node", state)
+    assert unknown_event["risk_assessment"] == {"level": "R2"}
+    assert "final_answer" not in unknown_event
+
+
+def test_resolve_worker_count_defaults_to_single_worker_for_memory_backend(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", False)
+    monkeypatch.setattr(settings, "API_WORKERS", 0)
+    monkeypatch.setattr(api_main, "backend", "memory")
+    assert api_main._resolve_worker_count() == 1
+
+    monkeypatch.setattr(settings, "API_WORKERS", 3)
+    assert api_main._resolve_worker_count() == 3
+
+    monkeypatch.setattr(settings, "API_WORKERS", 0)
+    monkeypatch.setattr(api_main, "backend", "redis")
+    assert api_main._resolve_worker_count() > 1
+
+
+def test_get_event_report_handles_non_string_keys(client):
+    test_client, store = client
+
+    report = {"summary": "ok", "counts": {1: "x", 2: "y"}}
+    asyncio.run(store.set("sess-4", {"final_report": report}, settings.SESSION_TTL_SECONDS))
+
+    response = test_client.get("/event/sess-4/report")
+
+    assert response.status_code == 200
+    assert response.json() == {"summary": "ok", "counts": {"1": "x", "2": "y"}}
+
+
+def test_get_event_report_falls_back_when_later_key_fails(client):
+    test_client, store = client
+
+    # 首个字段可被 orjson 序列化，后续字段超出 64 位整数范围
+    report = {"a": 1, "b": 2**70}
+    asyncio.run(store.set("sess-5", {"final_report": report}, settings.SESSION_TTL_SECONDS))
+
+    response = test_client.get("/event/sess-5/report")
+
+    assert response.status_code == 200
+    assert response.json() == report
@@ -133,6 +133,14 @@ class TestHelperFunctions:
 
         assert result is None  # 时间差超过1小时，返回None
 
+    def test_find_nearest_record_leaves_source_untouched(self, sample_weather_df):
+        """测试查询不修改共享的气象数据框"""
+        columns = list(sample_weather_df.columns)
+        result = find_nearest_record(sample_weather_df, '05L', pd.to_datetime('2026-01-06 05:40:00'))
+
+        assert result['time_diff'] == pd.Timedelta(minutes=10)
+        assert list(sample_weather_df.columns) == columns
+
     def test_format_weather_info_complete(self, sample_weather_df):
         """测试格式化完整气象信息"""
         record = sample_weather_df.iloc[1]  # 05:30的数据
@@ -1,6 +1,7 @@
 """
 空间分析工具测试
 """
+import numpy as np
 import pytest
 from tools.spatial.topology_loader import get_topology_loader
 from tools.spatial.calculate_impact_zone import CalculateImpactZoneTool
@@ -90,6 +91,36 @@ class TestTopologyLoader:
         affected_2 = topology.bfs_spread("taxiway_19", max_hops=2)
         assert len(affected_2) > len(affected)
 
+    def test_bfs_spread_levels_cached(self):
+        """测试分层BFS结果按起点与跳数缓存，且与扩散集合一致"""
+        topology = get_topology_loader()
+
+        start = next(n for n in topology.get_nodes_by_type("taxiway") if topology.get_adjacent_nodes(n))
+
+        levels = topology.bfs_spread_levels(start, 2)
+        assert levels[0] == {start}
+        assert len(levels) >= 2
+        assert topology.bfs_spread_levels(start, 2) is levels
+        assert frozenset().union(*levels) == topology.bfs_spread(start, 2)
+
+        # 不在拓扑图中的节点只返回自身
+        assert topology.bfs_spread("unknown_node", 3) == {"unknown_node"}
+
+    def test_bfs_csr_and_split_by_type(self):
+        """测试 CSR 上的 BFS 与按类型拆分节点"""
+        topology = get_topology_loader()
+        start = next(n for n in topology.get_nodes_by_type("taxiway") if topology.get_adjacent_nodes(n))
+
+        src_id = topology.get_node_index(start)
+        visited = topology.bfs_csr(src_id, 2)
+        assert visited.dtype == np.int32
+        assert {topology._node_ids[i] for i in visited} == topology.bfs_spread(start, 2)
+        assert topology.get_node_index("unknown_node") is None
+
+        stand = topology.get_nodes_by_type("stand")[0]
+        by_type = topology.split_nodes_by_type([start, "unknown_node", stand])
+        assert by_type == {"stand": [stand], "taxiway": [start], "runway": []}
+
 
 class TestCalculateImpactZone:
     """影响范围计算测试"""
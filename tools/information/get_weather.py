@@ -7,6 +7,7 @@ import pandas as pd
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
+from functools import lru_cache
 import re
 from tools.base import BaseTool
 
@@ -142,6 +143,12 @@ def _build_simulated_weather_data(
     return df
 
 
+@lru_cache(maxsize=32)
+def _get_simulated_weather_data(base_time: datetime) -> pd.DataFrame:
+    """按基准时间缓存模拟气象数据（同一基准时间的查询复用同一份数据）"""
+    return _build_simulated_weather_data(base_time, _load_raw_weather_stats())
+
+
 def load_weather_data() -> Optional[pd.DataFrame]:
     """从 data/processed 文件夹加载气象数据"""
     global _WEATHER_DATA, _DATA_FILE
@@ -207,25 +214,26 @@ def find_nearest_record(
     Returns:
         最接近的记录，如果未找到返回None
     """
-    # 筛选位置
-    df_loc = df[df['location_id'] == location].copy()
+    # 筛选位置（只取时间列计算，避免复制整个子表）
+    timestamps = df.loc[df['location_id'] == location, 'timestamp']
 
-    if len(df_loc) == 0:
+    if len(timestamps) == 0:
         return None
 
     # 计算时间差
     if timestamp is None:
-        timestamp = df_loc['timestamp'].max()
-    df_loc['time_diff'] = (df_loc['timestamp'] - timestamp).abs()
+        timestamp = timestamps.max()
+    time_diff = (timestamps - timestamp).abs()
 
     # 找到时间最接近的记录
-    idx = df_loc['time_diff'].idxmin()
-    nearest = df_loc.loc[idx]
+    idx = time_diff.idxmin()
 
     # 如果时间差超过1小时，认为数据不相关
-    if nearest['time_diff'].total_seconds() > 3600:
+    if time_diff[idx].total_seconds() > 3600:
         return None
 
+    nearest = df.loc[idx].copy()
+    nearest['time_diff'] = time_diff[idx]
     return nearest
 
 
@@ -408,9 +416,7 @@ class GetWeatherTool(BaseTool):
                         base_time = None
             if base_time is None:
                 base_time = datetime.fromisoformat("2025-10-21 10:00:00")
-            raw_stats = _load_raw_weather_stats()
-            df = _build_simulated_weather_data(base_time, raw_stats)
-            _WEATHER_DATA = df
+            df = _get_simulated_weather_data(base_time)
             using_simulated = True
 
         # 处理"推荐"位置
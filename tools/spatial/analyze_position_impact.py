@@ -309,12 +309,8 @@ class AnalyzePositionImpactTool(BaseTool):
             spread_nodes = topology.bfs_spread(node_id, spread_radius)
             # 移除起始节点和直接相邻节点
             additional_nodes = spread_nodes - {node_id} - set(adjacent_nodes)
-            for add_id in additional_nodes:
-                add_node = topology.get_node(add_id)
-                if add_node:
-                    add_type = add_node.get('type')
-                    if add_type in by_type:
-                        by_type[add_type].append(add_id)
+            for add_type, add_ids in topology.split_nodes_by_type(additional_nodes).items():
+                by_type[add_type].extend(add_ids)
 
         return {
             "total_adjacent": len(adjacent_nodes),
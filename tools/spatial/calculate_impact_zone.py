@@ -95,20 +95,10 @@ class CalculateImpactZoneTool(BaseTool):
         spread_levels = topology.bfs_spread_levels(start_node_id, rule["radius"])
 
         # 分类节点
-        affected_taxiways = []
-        affected_runways = []
-        affected_stands = []
-
-        for node_id in isolated_nodes:
-            node = topology.get_node(node_id)
-            if node:
-                node_type = node.get('type')
-                if node_type == 'taxiway':
-                    affected_taxiways.append(node_id)
-                elif node_type == 'runway':
-                    affected_runways.append(node_id)
-                elif node_type == 'stand':
-                    affected_stands.append(node_id)
+        by_type = topology.split_nodes_by_type(isolated_nodes)
+        affected_taxiways = by_type['taxiway']
+        affected_runways = by_type['runway']
+        affected_stands = by_type['stand']
 
         # 检查跑道影响 - 如果受影响的滑行道连接到跑道
         if rule["runway_impact"]:
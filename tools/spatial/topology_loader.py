@@ -5,9 +5,17 @@
 """
 import json
 import os
-from typing import Dict, Any, List, Set, Optional, Tuple, cast
+from typing import Dict, Any, FrozenSet, Iterable, List, Set, Optional, Tuple, cast
 from collections import defaultdict
 
+import numpy as np
+
+
+# 节点类型编码（CSR 存储中的 node_type 数组）
+NODE_TYPE_CODES = {'stand': 0, 'taxiway': 1, 'runway': 2}
+_UNKNOWN_NODE_TYPE = -1
+_NODE_TYPE_BY_CODE = {code: node_type for node_type, code in NODE_TYPE_CODES.items()}
+
 
 class TopologyLoader:
     """拓扑图加载器"""
@@ -38,6 +46,15 @@ class TopologyLoader:
         self.topology: Optional[Dict[str, Any]] = None
         self._adjacency_map: Optional[Dict[str, Set[str]]] = None
         self._node_types: Optional[Dict[str, List[str]]] = None
+        # 稠密整数编号的 CSR 邻接结构（BFS 使用）
+        self._node_ids: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self._node_names = np.empty(0, dtype=object)
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._indices = np.empty(0, dtype=np.int32)
+        self._node_type = np.empty(0, dtype=np.int8)
+        # BFS 分层结果缓存：(起始节点, 最大跳数) -> 各层节点
+        self._spread_cache: Dict[Tuple[str, int], Tuple[FrozenSet[str], ...]] = {}
 
     def load(self) -> Dict[str, Any]:
         """加载拓扑图数据"""
@@ -60,6 +77,9 @@ class TopologyLoader:
             # 构建节点类型索引
             self._build_node_type_index()
 
+            # 构建整数编号邻接表
+            self._build_node_id_index()
+
             return self.topology
 
         except FileNotFoundError:
@@ -96,6 +116,127 @@ class TopologyLoader:
             if node_type in self._node_types:
                 self._node_types[node_type].append(node_id)
 
+    def _build_node_id_index(self) -> None:
+        """为节点分配稠密整数编号，并构建 CSR 邻接数组（indptr/indices）与节点类型数组"""
+        assert self.topology is not None and self._adjacency_map is not None
+        nodes = self.topology['nodes']
+        node_ids = list(nodes)
+        node_ids.extend(n for n in self._adjacency_map if n not in nodes)
+        node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+        degrees = np.fromiter(
+            (len(self._adjacency_map.get(node_id, ())) for node_id in node_ids),
+            dtype=np.int32, count=len(node_ids),
+        )
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int32)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.fromiter(
+            (node_index[n] for node_id in node_ids for n in self._adjacency_map.get(node_id, ())),
+            dtype=np.int32, count=int(indptr[-1]),
+        )
+
+        self._node_ids = node_ids
+        self._node_index = node_index
+        self._node_names = np.array(node_ids, dtype=object)
+        self._indptr = indptr
+        self._indices = indices
+        self._node_type = np.fromiter(
+            (NODE_TYPE_CODES.get(str((nodes.get(node_id) or {}).get('type')), _UNKNOWN_NODE_TYPE)
+             for node_id in node_ids),
+            dtype=np.int8, count=len(node_ids),
+        )
+        self._spread_cache = {}
+
+    def _bfs_csr_levels(self, src_id: int, max_hops: int) -> List[np.ndarray]:
+        """
+        在 CSR 邻接数组上按层 BFS，返回每一跳新增节点编号（第0层为起点）
+
+        每层一次性展开整条前沿的邻居切片，用布尔数组去重与标记已访问。
+        """
+        indptr = self._indptr
+        indices = self._indices
+        visited = np.zeros(len(indptr) - 1, dtype=bool)
+        visited[src_id] = True
+        frontier = np.array([src_id], dtype=np.int32)
+        layers = [frontier]
+
+        for _ in range(max_hops):
+            starts = indptr[frontier]
+            lengths = indptr[frontier + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                break
+            # 拼接前沿各节点在 indices 中的切片位置
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+            neighbors = np.unique(indices[offsets])
+            frontier = neighbors[~visited[neighbors]]
+            if len(frontier) == 0:
+                break
+            visited[frontier] = True
+            layers.append(frontier)
+
+        return layers
+
+    def bfs_csr(self, src_id: int, max_hops: int) -> np.ndarray:
+        """
+        CSR 上的 BFS 扩散，返回起点 max_hops 跳内所有节点编号（int32 数组）
+
+        Args:
+            src_id: 起始节点编号（见 get_node_index）
+            max_hops: 最大扩散跳数
+        """
+        if self.topology is None:
+            self.load()
+        return np.concatenate(self._bfs_csr_levels(src_id, max_hops))
+
+    def get_node_index(self, node_id: str) -> Optional[int]:
+        """获取节点的整数编号（不在拓扑图中时为 None）"""
+        if self.topology is None:
+            self.load()
+        return self._node_index.get(node_id)
+
+    def _spread_levels(self, start_node: str, max_hops: int) -> Tuple[FrozenSet[str], ...]:
+        """分层 BFS：返回每一跳新增的节点（第0层为起点），结果按 (起点, 跳数) 缓存"""
+        key = (start_node, max_hops)
+        levels = self._spread_cache.get(key)
+        if levels is not None:
+            return levels
+
+        if self.topology is None:
+            self.load()
+        start_id = self._node_index.get(start_node)
+        if start_id is None:
+            # 不在拓扑图中的节点没有邻居，也不缓存
+            return (frozenset([start_node]),)
+
+        node_names = self._node_names
+        levels = tuple(
+            frozenset(node_names[layer].tolist())
+            for layer in self._bfs_csr_levels(start_id, max_hops)
+        )
+        self._spread_cache[key] = levels
+        return levels
+
+    def split_nodes_by_type(self, node_ids: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        按节点类型（stand/taxiway/runway）拆分节点，保持输入顺序
+
+        不在拓扑图中或类型未知的节点被忽略。
+        """
+        if self.topology is None:
+            self.load()
+        node_index = self._node_index
+        node_type = self._node_type
+        by_type: Dict[str, List[str]] = {name: [] for name in NODE_TYPE_CODES}
+        for node_id in node_ids:
+            index = node_index.get(node_id)
+            if index is None:
+                continue
+            type_name = _NODE_TYPE_BY_CODE.get(int(node_type[index]))
+            if type_name is not None:
+                by_type[type_name].append(node_id)
+        return by_type
+
     def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
         """获取节点信息"""
         topology = self.load()
@@ -230,7 +371,7 @@ class TopologyLoader:
 
         return None
 
-    def bfs_spread(self, start_node: str, max_hops: int) -> Set[str]:
+    def bfs_spread(self, start_node: str, max_hops: int) -> FrozenSet[str]:
         """
         BFS扩散算法 - 从起始节点扩散指定跳数
 
@@ -241,53 +382,13 @@ class TopologyLoader:
         Returns:
             受影响的所有节点ID集合
         """
-        if self._adjacency_map is None:
-            self.load()
-        assert self._adjacency_map is not None
-        adjacency_map = self._adjacency_map
-
-        visited = {start_node}
-        queue = [(start_node, 0)]
-
-        while queue:
-            node, hops = queue.pop(0)
-            if hops >= max_hops:
-                continue
-
-            for neighbor in adjacency_map.get(node, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, hops + 1))
+        return frozenset().union(*self._spread_levels(start_node, max_hops))
 
-        return visited
-
-    def bfs_spread_levels(self, start_node: str, max_hops: int) -> List[Set[str]]:
+    def bfs_spread_levels(self, start_node: str, max_hops: int) -> Tuple[FrozenSet[str], ...]:
         """
         BFS扩散分层结果 - 返回每一跳的节点集合（包含起点在第0层）
         """
-        if self._adjacency_map is None:
-            self.load()
-        assert self._adjacency_map is not None
-        adjacency_map = self._adjacency_map
-
-        visited = {start_node}
-        layers: List[Set[str]] = [set([start_node])]
-        queue = [(start_node, 0)]
-
-        while queue:
-            node, hops = queue.pop(0)
-            if hops >= max_hops:
-                continue
-            for neighbor in adjacency_map.get(node, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    next_hops = hops + 1
-                    while len(layers) <= next_hops:
-                        layers.append(set())
-                    layers[next_hops].add(neighbor)
-                    queue.append((neighbor, next_hops))
-
-        return layers
+        return self._spread_levels(start_node, max_hops)
 
     def get_statistics(self) -> Dict[str, Any]:
         """获取拓扑图统计信息"""